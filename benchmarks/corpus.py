@@ -0,0 +1,68 @@
+"""Synthetic files and trees for the benchmarks, the same seed always makes the same corpus"""
+import json
+import os
+import random
+
+WORDS = ["import", "def", "class", "return", "self", "value", "result", "index", "data", "print", "None", "items"]
+NAMES = ["value", "result", "index", "data", "items", "name", "count", "path", "text", "node", "café", "größe"]
+
+
+def python_source(lines: int, seed: int = 0) -> str:
+    """Python with a bit of everything the lexer styles, about lines lines long"""
+    rng = random.Random(seed)
+    out = ["import os", "import sys", "from pathlib import Path", ""]
+    while len(out) < lines:
+        name = rng.choice(NAMES)
+        kind = rng.random()
+        if kind < 0.15:
+            out += [
+                "",
+                f"class {name.title()}{len(out)}(object):",
+                '    """A docstring that',
+                "    spans a few lines",
+                '    """',
+                "",
+                f"    def __init__(self, {name}=None):",
+                f"        self.{name} = {name}",
+            ]
+        elif kind < 0.5:
+            out += [
+                "",
+                f"def {name}_{len(out)}(path, *args, key={rng.randint(0, 99)}, **kwargs):",
+                f"    # {' '.join(rng.choice(WORDS) for _ in range(6))}",
+                f"    {name} = [len(str(x)) for x in range({rng.randint(1, 999)})]",
+                f"    if isinstance({name}, list) and {name} is not None:",
+                f"        print(f\"{{path}}: {{{name}!r}}\", file=sys.stderr)",
+                f"    return dict({name}={name}, value='{rng.choice(NAMES)}')",
+            ]
+        else:
+            out.append(f"{name} = {{\"{rng.choice(WORDS)}\": {rng.random():.4f}, 'n': [1, 2, 3]}}  # {rng.choice(NAMES)}")
+    return "\n".join(out[:lines]) + "\n"
+
+
+def json_source(lines: int, seed: int = 0) -> str:
+    """Indented json about lines lines long"""
+    rng = random.Random(seed)
+    entries = []
+    # every entry takes 7 lines once indented
+    for i in range(max(1, lines // 7)):
+        entries.append({
+            "id": i,
+            "name": rng.choice(NAMES),
+            "enabled": rng.random() < 0.5,
+            "score": round(rng.random() * 100, 3),
+            "tags": None,
+        })
+    return json.dumps(entries, indent=4, ensure_ascii=False) + "\n"
+
+
+def make_tree(path: str, files: int, lines: int, seed: int = 0):
+    """files python modules spread over 50 folders, between 1 and 2 * lines lines each"""
+    rng = random.Random(seed)
+    for i in range(files):
+        folder = os.path.join(path, f"pkg{i % 50}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"module{i}.py"), "w", encoding="utf-8") as f:
+            # sizes vary a lot like in a real tree
+            for _ in range(rng.randint(1, lines * 2)):
+                f.write("    ".join(rng.choice(WORDS) for _ in range(8)) + "\n")
@@ -0,0 +1,72 @@
+"""Files per second of SearchWorker's sequential and parallel searches
+
+    python benchmarks/search_bench.py --files 5000 --workers 1 2 4 8
+
+Page cache: every run after the first reads warm files, pass --drop-caches
+(needs root) to drop them before each run for cold numbers.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fuzzy_searcher import SearchWorker
+
+from corpus import make_tree
+
+
+def drop_caches():
+    subprocess.run(["sync"])
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except OSError as err:
+        print("can't drop caches:", err)
+
+
+def run(worker: SearchWorker, path: str, pattern: str, cold: bool) -> tuple[float, int]:
+    if cold:
+        drop_caches()
+    worker.search_text = pattern
+    worker.search_path = path
+    worker.search_project = False
+    start = time.perf_counter()
+    worker.search()
+    return time.perf_counter() - start, worker.hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pattern", default=r"result\s+index\s+data")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--drop-caches", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        make_tree(path, args.files, args.lines)
+
+        for workers in [0] + args.workers:
+            worker = SearchWorker(workers)
+            if worker.scanner is not None:
+                run(worker, path, args.pattern, False) # start the pool
+            times = []
+            for _ in range(args.repeat):
+                elapsed, hits = run(worker, path, args.pattern, args.drop_caches)
+                times.append(elapsed)
+            if worker.scanner is not None:
+                worker.scanner.shutdown()
+
+            best = min(times)
+            name = "sequential" if workers == 0 else f"{workers} workers"
+            print(f"{name:>12}: {best:.3f}s {args.files / best:10.0f} files/s ({hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
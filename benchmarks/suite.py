@@ -0,0 +1,249 @@
+"""Headless benchmarks of the lexers, search, completion and opening files
+
+    python benchmarks/suite.py --lines 20000 --files 2000 --output results.json
+
+Runs offscreen, corpora are generated in a temporary folder with a fixed
+seed so runs with the same arguments can be compared. Every benchmark is
+written to the json output with all of its runs in seconds, along with
+the commit and the versions it ran on.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from PyQt5.QtCore import QEventLoop, QTimer, QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication
+from PyQt5.Qsci import QsciScintilla
+from pathlib import Path
+
+from corpus import python_source, json_source, make_tree
+
+BENCHMARKS = ["lexer", "search", "completion", "open"]
+VISIBLE_LINES = 60 # scintilla asks for styling up to the end of what's on screen
+
+
+def timings(runs: list[float], **extra) -> dict:
+    return {
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        **extra,
+    }
+
+
+def wait_for(signal, timeout: float) -> bool:
+    """Run the event loop until signal fires, False if it didn't within timeout seconds"""
+    loop = QEventLoop()
+    fired = []
+    def done(*args):
+        fired.append(True)
+        loop.quit()
+    signal.connect(done)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    loop.exec_()
+    signal.disconnect(done)
+    return bool(fired)
+
+
+def bench_lexer(args, results: dict):
+    from lexer import PyCustomLexer, JsonLexer
+
+    for name, cls, source in [
+        ("python", PyCustomLexer, python_source(args.lines)),
+        ("json", JsonLexer, json_source(args.lines)),
+    ]:
+        editor = QsciScintilla()
+        lexer = cls(editor)
+        editor.setLexer(lexer)
+        editor.setText(source)
+        length = editor.length()
+
+        runs = []
+        for _ in range(args.repeat):
+            # forget what was styled so the whole document is done again
+            lexer._styled_end = 0
+            lexer._dirty_end = -1
+            start = time.perf_counter()
+            lexer.styleText(0, length)
+            runs.append(time.perf_counter() - start)
+        results[f"lexer.{name}.full"] = timings(
+            runs, bytes=length, bytes_per_second=length / statistics.median(runs)
+        )
+
+        # one character typed at lines spread over the document, then styled up to the end of the screen
+        lines = editor.lines()
+        runs = []
+        for i in range(args.keystrokes):
+            line = (i * 7919) % max(1, lines - 1)
+            editor.insertAt("x", line, 0)
+            pos = editor.positionFromLineIndex(line, 0)
+            end = editor.positionFromLineIndex(min(lines - 1, line + VISIBLE_LINES), 0)
+            start = time.perf_counter()
+            lexer.styleText(pos, max(end, pos + 1))
+            runs.append(time.perf_counter() - start)
+            editor.SendScintilla(QsciScintilla.SCI_DELETERANGE, pos, 1)
+            lexer.styleText(pos, max(end - 1, pos + 1))
+        results[f"lexer.{name}.keystroke"] = timings(runs)
+
+
+def bench_search(args, results: dict):
+    from fuzzy_searcher import SearchWorker
+
+    with tempfile.TemporaryDirectory() as path:
+        make_tree(path, args.files, args.file_lines)
+        size = sum(
+            os.path.getsize(os.path.join(folder, f)) for folder, _, files in os.walk(path) for f in files
+        )
+        for workers in [0] + args.workers:
+            worker = SearchWorker(workers)
+            worker.search_text = args.pattern
+            worker.search_path = path
+            worker.search_project = False
+            # warms the page cache, the ignore cache and the pool
+            worker.search()
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                worker.search()
+                runs.append(time.perf_counter() - start)
+            if worker.scanner is not None:
+                worker.scanner.shutdown()
+            median = statistics.median(runs)
+            name = "sequential" if workers == 0 else f"workers{workers}"
+            results[f"search.{name}"] = timings(
+                runs, files=args.files, bytes=size, hits=worker.hits,
+                files_per_second=args.files / median, bytes_per_second=size / median,
+            )
+
+
+def bench_completion(args, results: dict):
+    from autocompleter import AutoCompleter
+
+    with tempfile.TemporaryDirectory() as path:
+        file_path = os.path.join(path, "module.py")
+        source = python_source(args.lines) + "os.pa"
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        line = source.count("\n") + 1
+        index = len("os.pa")
+
+        completer = AutoCompleter(file_path)
+        runs = []
+        for i in range(args.repeat + 1):
+            start = time.perf_counter()
+            completer.get_completion(line, index, source, i)
+            if not wait_for(completer.completions_ready, 60):
+                print("completion timed out", file=sys.stderr)
+                return
+            runs.append(time.perf_counter() - start)
+            completer.wait()
+        # the first one imports jedi and parses the standard library modules
+        results["completion.first"] = timings(runs[:1])
+        results["completion.round_trip"] = timings(runs[1:], lines=line)
+
+
+def bench_open(args, results: dict):
+    from main import MainWindow
+
+    window = MainWindow()
+    window.show()
+    QApplication.processEvents()
+
+    with tempfile.TemporaryDirectory() as path:
+        files = {"python": Path(path) / "module.py", "json": Path(path) / "data.json"}
+        files["python"].write_text(python_source(args.lines), encoding="utf-8")
+        files["json"].write_text(json_source(args.lines), encoding="utf-8")
+        if args.large_mb:
+            large = files["large"] = Path(path) / "large.py"
+            chunk = python_source(5000)
+            with open(large, "w", encoding="utf-8") as f:
+                for _ in range(args.large_mb * 1024 * 1024 // len(chunk.encode()) + 1):
+                    f.write(chunk)
+
+        for name, file_path in files.items():
+            opened, painted, loaded = [], [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                window.set_new_tab(file_path)
+                opened.append(time.perf_counter() - start)
+                # first paint styles what's on screen
+                QApplication.processEvents()
+                painted.append(time.perf_counter() - start)
+                editor = window.tab_view.currentWidget()
+                while editor.loader is not None:
+                    QApplication.processEvents(QEventLoop.WaitForMoreEvents)
+                loaded.append(time.perf_counter() - start)
+                window.close_tab(window.tab_view.currentIndex())
+                QApplication.processEvents()
+            size = file_path.stat().st_size
+            results[f"open.{name}.set_new_tab"] = timings(opened, bytes=size)
+            results[f"open.{name}.first_paint"] = timings(painted, bytes=size)
+            if name == "large":
+                results[f"open.{name}.loaded"] = timings(loaded, bytes=size)
+
+    window.file_saver.shutdown()
+
+
+def commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--lines", type=int, default=10000, help="lines of the generated python and json files")
+    parser.add_argument("--keystrokes", type=int, default=200)
+    parser.add_argument("--files", type=int, default=1000, help="files in the searched tree")
+    parser.add_argument("--file-lines", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, 4])
+    parser.add_argument("--pattern", default=r"result\s+index\s+data")
+    parser.add_argument("--large-mb", type=int, default=16, help="size of the large file opened, 0 to skip it")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="json file the results are written to")
+    args = parser.parse_args()
+
+    # the lexers and the editor read theme.json and the icons relative to the repo
+    os.chdir(ROOT)
+    app = QApplication(sys.argv)
+
+    results = {}
+    benchmarks = {"lexer": bench_lexer, "search": bench_search, "completion": bench_completion, "open": bench_open}
+    for name in BENCHMARKS:
+        if name in args.only:
+            print(f"running {name}...", file=sys.stderr)
+            benchmarks[name](args, results)
+
+    for name, result in results.items():
+        print(f"{name:>32}: median {result['median'] * 1000:10.2f}ms  min {result['min'] * 1000:10.2f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "commit": commit(),
+                "python": platform.python_version(),
+                "qt": QT_VERSION_STR,
+                "platform": platform.platform(),
+                "arguments": vars(args),
+                "results": results,
+            }, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
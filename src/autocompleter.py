@@ -1,40 +1,245 @@
-from PyQt5.QtCore import QThread
-from PyQt5.Qsci import QsciAPIs
-from jedi import Script
-from jedi.api import Completion
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from typing import TYPE_CHECKING
+from pathlib import Path
+import threading
+import time
+
+from metrics import metrics
+
+# jedi takes a while to import, it's only loaded once something needs completions
+if TYPE_CHECKING:
+    from jedi import Script, Project
+    from jedi.api import Completion
+    from jedi.api.environment import Environment
+
+
+def is_completion_trigger(text: str) -> bool:
+    """Check if typing `text` should ask for completions"""
+    return text == "." or (len(text) == 1 and (text.isalnum() or text == "_"))
+
+
+class JediProject(QThread):
+    """One jedi Project shared by every editor in the opened folder.
+
+    jedi caches the environment and its sys.path on the Project, so keeping
+    it around saves resolving them again for every completion. It's rebuilt
+    when the folder or the environment changes.
+    """
+
+    # modules imported by most files, parsed ahead of time by warm_up
+    PRELOAD_MODULES = ["os", "sys", "re", "json", "typing", "pathlib", "collections"]
+
+    def __init__(self, root: Path, env: "Environment" = None):
+        super(JediProject, self).__init__(None)
+
+        self.root = Path(root)
+        self.env = env
+        self.warmed = False # warm_up was asked for, rebuilt projects are warmed up again
+        self.warm_up_pending = False # rebuilt while warming up the old one
+        self._project: "Project" = None
+        self._lock = threading.Lock()
+        self.finished.connect(self.warm_up_finished)
+
+    @property
+    def project(self) -> "Project":
+        from jedi import Project
+        with self._lock:
+            if self._project is None:
+                self._project = Project(
+                    self.root,
+                    environment_path=self.env.executable if self.env is not None else None,
+                )
+            return self._project
+
+    def set_root(self, root: Path):
+        if Path(root) != self.root:
+            self.root = Path(root)
+            self.invalidate()
+
+    def set_environment(self, env: "Environment"):
+        if env != self.env:
+            self.env = env
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._project = None
+        if self.warmed:
+            self.warm_up()
+
+    def warm_up(self):
+        """Create the project and preload the common modules in the background"""
+        self.warmed = True
+        if self.isRunning():
+            # start() does nothing while it runs, the new project is warmed up after it
+            self.warm_up_pending = True
+            return
+        self.start()
+
+    def warm_up_finished(self):
+        if self.warm_up_pending:
+            self.warm_up_pending = False
+            self.wait() # finished comes just before the thread is done
+            self.start()
+
+    def run(self):
+        from jedi import Script
+        project = self.project
+        try:
+            # loads the environment, its sys.path and the module files
+            for module in self.PRELOAD_MODULES:
+                code = f"import {module}; {module}."
+                Script(code, project=project).complete(1, len(code))
+        except Exception as err:
+            print("Autocomplete Error:", err)
+
 
 class AutoCompleter(QThread):
-    def __init__(self, file_path, api):
+
+    # version of the document, completion names, emitted from the thread
+    completions_ready = pyqtSignal(int, list)
+
+    # jedi runs in this process and needs a copy of the document
+    wants_text = True
+
+    def __init__(self, file_path, project: JediProject = None):
         super(AutoCompleter, self).__init__(None)
         
         self.file_path = file_path
-        self.script: Script = None
-        self.api: QsciAPIs = api
-        self.completions: list[Completion] = None
+        self.project = project
+        self.script: "Script" = None
+        self.completions: list["Completion"] = None
 
         self.line = 0
         self.index = 0
         self.text = ""
+        self.version = 0 # version of the document the completions are for
 
 
     def run(self):
+        from jedi import Script
+        timed = metrics.enabled
+        if timed:
+            began = time.perf_counter()
+        self.completions = []
         try:
-            self.script: Script =  Script(self.text, path=self.file_path)
-            self.completions: list[Completion] = self.script.complete(self.line, self.index)
-            self.load_autocomplete(self.completions)
+            project = self.project.project if self.project is not None else None
+            self.script = Script(self.text, path=self.file_path, project=project)
+            self.completions = self.script.complete(self.line, self.index)
         except Exception as err:
             print("Autocomplete Error:", err)
-        
-        self.finished.emit()
-
-
-    def load_autocomplete(self, completions: list[Completion]):
-        self.api.clear()
-        [self.api.add(i.name) for i in completions]
-        self.api.prepare()
+        if timed:
+            metrics.record("completion.jedi", time.perf_counter() - began)
+        self.completions_ready.emit(self.version, [c.name for c in self.completions])
 
-    def get_completion(self, line: int, index: int, text: str):
+    def get_completion(self, line: int, index: int, text: str, version: int = 0):
         self.line = line
         self.index = index
         self.text = text
-        self.start()
\ No newline at end of file
+        self.version = version
+        self.start()
+
+    def close_document(self):
+        pass
+
+
+class CompletionScheduler(QObject):
+    """Debounces completion requests for an AutoCompleter.
+
+    Only the latest request is kept, requests that come in while waiting or
+    while jedi is still busy replace the pending one. Completions for an
+    older version of the document are dropped, the rest are passed on
+    through completions_ready along with where they were asked for.
+    """
+
+    completions_ready = pyqtSignal(int, int, list) # line, index, names
+
+    DEBOUNCE_MS = 150
+
+    def __init__(self, completer, get_text, debounce_ms: int = DEBOUNCE_MS):
+        super(CompletionScheduler, self).__init__(None)
+
+        self.completer = completer
+        self.get_text = get_text # only called when a request is issued
+        self.version = 0 # bumped on every change to the document
+        self.pending = None # (line, index) of the request waiting to be issued
+        self.issued = None # (line, index) of the request the completer is working on
+        # when the keystroke behind the pending and the issued request came, only kept for metrics
+        self.pending_since = None
+        self.issued_since = None
+        # the view of the document that asked, split views of a file share one scheduler
+        self.pending_view = None
+        self.issued_view = None
+
+        self.requests_issued = 0
+        self.requests_coalesced = 0
+        self.results_discarded = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.issue)
+
+        self.completer.completions_ready.connect(self.completions_received)
+        self.completer.finished.connect(self.completer_finished)
+
+    @property
+    def debounce_ms(self) -> int:
+        return self.timer.interval()
+
+    @debounce_ms.setter
+    def debounce_ms(self, value: int):
+        self.timer.setInterval(value)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "issued": self.requests_issued,
+            "coalesced": self.requests_coalesced,
+            "discarded": self.results_discarded,
+        }
+
+    def text_changed(self):
+        self.version += 1
+
+    def request(self, line: int, index: int, immediate=False, view=None):
+        """Ask for completions at line, index once the debounce window passes"""
+        if self.pending is not None:
+            self.requests_coalesced += 1
+        self.pending = (line, index)
+        self.pending_view = view
+        self.pending_since = time.perf_counter() if metrics.enabled else None
+
+        if immediate:
+            self.timer.stop()
+            self.issue()
+        else:
+            self.timer.start()
+
+    def issue(self):
+        # a busy completer picks up the pending request when it finishes
+        if self.pending is None or self.completer.isRunning():
+            return
+
+        line, index = self.issued = self.pending
+        self.issued_since = self.pending_since
+        self.issued_view = self.pending_view
+        self.pending = None
+        self.requests_issued += 1
+        if metrics.enabled:
+            metrics.count("completion.requests")
+        text = self.get_text() if self.completer.wants_text else ""
+        self.completer.get_completion(line, index, text, self.version)
+
+    def completions_received(self, version: int, names: list[str]):
+        if version != self.version:
+            self.results_discarded += 1
+            if metrics.enabled:
+                metrics.count("completion.discarded")
+            return
+        line, index = self.issued
+        self.completions_ready.emit(line, index, names)
+
+    def completer_finished(self):
+        if not self.timer.isActive():
+            self.issue()
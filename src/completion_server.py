@@ -0,0 +1,267 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.Qsci import QsciScintilla
+
+from typing import TYPE_CHECKING
+from pathlib import Path
+import multiprocessing
+import threading
+import time
+
+from completion_worker import worker_main
+from metrics import metrics
+
+# the protocol and the worker loop are in completion_worker
+
+# jedi is only imported by the worker processes
+if TYPE_CHECKING:
+    from jedi.api.environment import Environment
+
+
+class CompletionWorker:
+    """A worker process and the thread reading its replies"""
+
+    def __init__(self, server: "CompletionServer"):
+        self.server = server
+        self.documents: set[int] = set()
+        self.requests: dict[int, float] = {} # request_id -> time it was sent
+        self.start()
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=worker_main,
+            args=(child_conn, str(self.server.root), self.server.environment_path),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.reader = threading.Thread(target=self.read, args=(self.conn,), daemon=True)
+        self.reader.start()
+
+    def read(self, conn):
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                return
+            self.server.message_received.emit(self, conn, msg)
+
+    def send(self, msg):
+        try:
+            self.conn.send(msg)
+        except (BrokenPipeError, OSError):
+            # the watchdog restarts it
+            pass
+
+    def stop(self):
+        self.conn.close()
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def restart(self):
+        self.stop()
+        self.documents.clear()
+        self.requests.clear()
+        self.start()
+
+
+class CompletionServer(QObject):
+    """Runs jedi in a pool of worker processes.
+
+    Every document is pinned to one worker which keeps its text, so only
+    the edits made since the last request are sent. Documents are spread
+    over the workers so several editors are completed at the same time.
+    A worker that doesn't answer within TIMEOUT seconds is killed and
+    started again.
+    """
+
+    message_received = pyqtSignal(object, object, object) # worker, connection, message
+
+    TIMEOUT = 10
+
+    def __init__(self, workers: int, root: Path, env: "Environment" = None):
+        super(CompletionServer, self).__init__(None)
+
+        self.root = Path(root)
+        self.environment_path = env.executable if env is not None else None
+
+        self.completers: dict[int, "RemoteCompleter"] = {} # doc_id -> completer
+        self.requests: dict[int, int] = {} # request_id -> doc_id
+        self.next_doc_id = 0
+        self.next_request_id = 0
+
+        self.message_received.connect(self.handle_message)
+        self.workers = [CompletionWorker(self) for _ in range(max(1, workers))]
+
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(1000)
+        self.watchdog.timeout.connect(self.check_workers)
+        self.watchdog.start()
+
+    def set_project(self, root: Path, env: "Environment" = None):
+        self.root = Path(root)
+        self.environment_path = env.executable if env is not None else None
+        for worker in self.workers:
+            worker.send(("project", str(self.root), self.environment_path))
+
+    def register(self, completer: "RemoteCompleter") -> int:
+        """Pin a document to the least busy worker and return its id"""
+        doc_id = self.next_doc_id
+        self.next_doc_id += 1
+        self.completers[doc_id] = completer
+        min(self.workers, key=lambda w: len(w.documents)).documents.add(doc_id)
+        return doc_id
+
+    def unregister(self, doc_id: int):
+        self.completers.pop(doc_id, None)
+        worker = self.worker_for(doc_id)
+        if worker is not None:
+            worker.documents.discard(doc_id)
+            worker.send(("close", doc_id))
+
+    def worker_for(self, doc_id: int) -> CompletionWorker:
+        for worker in self.workers:
+            if doc_id in worker.documents:
+                return worker
+        return None
+
+    def complete(self, doc_id, path, full_text, deltas, line, column) -> int:
+        worker = self.worker_for(doc_id)
+        if worker is None:
+            # the worker was restarted, pin the document again
+            worker = min(self.workers, key=lambda w: len(w.documents))
+            worker.documents.add(doc_id)
+
+        request_id = self.next_request_id
+        self.next_request_id += 1
+        worker.requests[request_id] = time.monotonic()
+        self.requests[request_id] = doc_id
+        worker.send(("complete", request_id, doc_id, path, full_text, deltas, line, column))
+        return request_id
+
+    def handle_message(self, worker: CompletionWorker, conn, msg):
+        if conn is not worker.conn:
+            # reply from a worker that has been restarted since
+            return
+
+        worker.requests.pop(msg[1], None)
+        completer = self.completers.get(self.requests.pop(msg[1], None))
+        if completer is None:
+            return
+        if msg[0] == "resync":
+            completer.resync()
+        else:
+            completer.deliver(msg[1], msg[2])
+
+    def check_workers(self):
+        now = time.monotonic()
+        for worker in self.workers:
+            hung = any(now - sent > self.TIMEOUT for sent in worker.requests.values())
+            if not hung and worker.process.is_alive():
+                continue
+
+            print("Autocomplete Error: restarting completion worker")
+            documents = worker.documents.copy()
+            requests = worker.requests.copy()
+            worker.restart()
+            for request_id in requests:
+                self.requests.pop(request_id, None)
+            for doc_id in documents:
+                completer = self.completers.get(doc_id)
+                if completer is None:
+                    continue
+                completer.synced = False
+                if completer.request_id in requests:
+                    completer.deliver(completer.request_id, [])
+
+    def shutdown(self):
+        self.watchdog.stop()
+        for worker in self.workers:
+            worker.stop()
+
+
+class RemoteCompleter(QObject):
+    """Drop in replacement for AutoCompleter that runs on a CompletionServer"""
+
+    completions_ready = pyqtSignal(int, list) # version, names
+    finished = pyqtSignal()
+
+    # the server keeps its own copy of the document
+    wants_text = False
+
+    def __init__(self, file_path, server: CompletionServer, editor: QsciScintilla):
+        super(RemoteCompleter, self).__init__(None)
+
+        self.file_path = file_path
+        self.server = server
+        self.editor = editor
+        self.completions: list[str] = []
+
+        self.doc_id = self.server.register(self)
+        self.synced = False # the worker has the document
+        self.deltas: list[tuple[int, int, bytes]] = [] # edits since the last request
+        self.request_id = None
+        self.sent_at = None
+
+        self.line = 0
+        self.index = 0
+        self.version = 0
+
+        self.editor.SCN_MODIFIED.connect(self.document_modified)
+
+    def document_modified(self, position, mod_type, text, length, *args):
+        if not self.synced:
+            return
+        if mod_type & QsciScintilla.SC_MOD_INSERTTEXT:
+            data = bytes(self.editor.bytes(position, position + length))[:length]
+            self.deltas.append((position, position, data))
+        elif mod_type & QsciScintilla.SC_MOD_DELETETEXT:
+            self.deltas.append((position, position + length, b""))
+
+    def isRunning(self) -> bool:
+        return self.request_id is not None
+
+    def get_completion(self, line: int, index: int, text: str, version: int = 0):
+        self.line = line
+        self.index = index
+        self.version = version
+        self.send()
+
+    def send(self):
+        if self.synced:
+            full_text = None
+            deltas, self.deltas = self.deltas, []
+        else:
+            # the full text already has every edit
+            length = self.editor.length()
+            full_text = bytes(self.editor.bytes(0, length))[:length]
+            deltas, self.deltas = [], []
+            self.synced = True
+
+        self.sent_at = time.perf_counter() if metrics.enabled else None
+        self.request_id = self.server.complete(
+            self.doc_id, str(self.file_path), full_text, deltas, self.line, self.index
+        )
+
+    def resync(self):
+        """The worker lost the document, send the request again with the full text"""
+        self.synced = False
+        self.send()
+
+    def deliver(self, request_id: int, names: list[str]):
+        if request_id != self.request_id:
+            return
+        self.request_id = None
+        if metrics.enabled and self.sent_at is not None:
+            metrics.record("completion.remote", time.perf_counter() - self.sent_at)
+        self.completions = names
+        self.completions_ready.emit(self.version, names)
+        self.finished.emit()
+
+    def close_document(self):
+        self.editor.SCN_MODIFIED.disconnect(self.document_modified)
+        self.server.unregister(self.doc_id)
@@ -0,0 +1,49 @@
+# kept free of Qt, the completion worker processes import this module when they start
+
+# Protocol, every message is a tuple
+# gui -> worker:
+#   ("complete", request_id, doc_id, path, full_text or None, deltas, line, column)
+#       deltas is a list of (start, end, data) byte replacements applied in order
+#   ("close", doc_id)
+#   ("project", root, environment_path)
+# worker -> gui:
+#   ("result", request_id, names)
+#   ("resync", request_id)  the worker doesn't have the document, send the full text
+
+
+def worker_main(conn, root, environment_path):
+    """Entry point of a completion worker process"""
+    from jedi import Script, Project
+
+    project = Project(root, environment_path=environment_path)
+    documents: dict[int, bytearray] = {}
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if msg[0] == "complete":
+            _, request_id, doc_id, path, full_text, deltas, line, column = msg
+            if full_text is not None:
+                documents[doc_id] = bytearray(full_text)
+            elif doc_id not in documents:
+                conn.send(("resync", request_id))
+                continue
+
+            doc = documents[doc_id]
+            for start, end, data in deltas:
+                doc[start:end] = data
+
+            names = []
+            try:
+                script = Script(doc.decode("utf-8", errors="replace"), path=path, project=project)
+                names = [c.name for c in script.complete(line, column)]
+            except Exception as err:
+                print("Autocomplete Error:", err)
+            conn.send(("result", request_id, names))
+        elif msg[0] == "close":
+            documents.pop(msg[1], None)
+        elif msg[0] == "project":
+            project = Project(msg[1], environment_path=msg[2])
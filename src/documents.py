@@ -0,0 +1,79 @@
+from typing import TYPE_CHECKING
+
+from pathlib import Path
+import os
+
+if TYPE_CHECKING:
+    from editor import Editor
+    from file_watcher import FileWatcher
+
+
+def document_key(path) -> str:
+    """Resolved absolute path, the same file opened through a symlink or a relative path gets the same key"""
+    return os.path.normcase(os.path.realpath(path))
+
+
+class DocumentRegistry:
+    """The open editors by the file they're editing.
+
+    Untitled editors aren't in it until they're saved somewhere. Looking up,
+    adding and removing a file don't depend on how many tabs are open, only
+    renaming or deleting a folder goes over the open files to find the ones
+    inside it. With a watcher the open files are watched for changes made
+    outside the editor.
+    """
+
+    def __init__(self, watcher: "FileWatcher" = None):
+        self.editors: dict[str, "Editor"] = {} # key -> editor
+        self.keys: dict["Editor", str] = {} # editor -> key
+        self.watcher = watcher
+
+    def __len__(self):
+        return len(self.editors)
+
+    def get(self, path) -> "Editor":
+        return self.editors.get(document_key(path))
+
+    def add(self, path, editor: "Editor") -> "Editor":
+        """Register editor for path, replacing whatever was registered for either of them.
+
+        Returns the other editor path was open in, it isn't registered anymore
+        and its tab has to be closed. None if there wasn't one.
+        """
+        self.remove(editor)
+        key = document_key(path)
+        previous = self.editors.get(key)
+        if previous is not None:
+            del self.keys[previous]
+        self.editors[key] = editor
+        self.keys[editor] = key
+        if self.watcher is not None and previous is None:
+            self.watcher.watch_files([key])
+        return previous
+
+    def remove(self, editor: "Editor"):
+        key = self.keys.pop(editor, None)
+        if key is not None:
+            del self.editors[key]
+            if self.watcher is not None:
+                self.watcher.unwatch_files([key])
+
+    def under(self, path) -> list["Editor"]:
+        """Editors of path and, when it's a folder, of the files inside it"""
+        key = document_key(path)
+        editor = self.editors.get(key)
+        if editor is not None:
+            return [editor]
+        prefix = key.rstrip(os.sep) + os.sep
+        return [e for k, e in self.editors.items() if k.startswith(prefix)]
+
+    def moved(self, old, new) -> list[tuple["Editor", Path]]:
+        """Follow a file or folder that was renamed from old to new, returns (editor, new path) of the ones that moved"""
+        old_key = document_key(old)
+        moved = []
+        for editor in self.under(old):
+            rel = self.keys[editor][len(old_key):].lstrip(os.sep)
+            path = Path(new) / rel if rel else Path(new)
+            self.add(path, editor)
+            moved.append((editor, path))
+        return moved
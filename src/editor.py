@@ -1,33 +1,51 @@
 from typing import TYPE_CHECKING
 
 from pathlib import Path
-from PyQt5.Qsci import QsciScintilla, QsciAPIs
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QColor, QKeyEvent
-
-from lexer import PyCustomLexer, JsonLexer
+import re
+import time
+from PyQt5.Qsci import QsciScintilla
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont, QColor, QKeyEvent, QContextMenuEvent
+from PyQt5.QtWidgets import QWidget
+
+from lexer import PyCustomLexer, JsonLexer, TreeSitterLexer
 from file_types import get_file_type, FileType
-from autocompleter import AutoCompleter
+from autocompleter import AutoCompleter, CompletionScheduler, is_completion_trigger
+from completion_server import RemoteCompleter
+from file_loader import FileLoader
+from metrics import metrics
 
 if TYPE_CHECKING:
     from main import MainWindow
 
 
+def common_prefix(a: bytes, b: bytes) -> int:
+    """How many bytes a and b start with in common, compared a block at a time"""
+    n = min(len(a), len(b))
+    pos, step = 0, 64 * 1024
+    while step and pos < n:
+        end = min(pos + step, n)
+        if a[pos:end] == b[pos:end]:
+            pos = end
+        else:
+            # the difference is in this block, narrow it down
+            step //= 2
+    return pos
+
+
 class Editor(QsciScintilla):
+    load_progress = pyqtSignal(int, int) # bytes read, file size
+    load_finished = pyqtSignal()
 
-    def __init__(self, main_window, parent=None, path: Path = None, file_type=".py", env=None):
+    def __init__(self, main_window, parent=None, path: Path = None, file_type=".py", env=None, large_file=False):
         super(Editor, self).__init__(parent)
-        self.first_launch = True # variable to keep track of if it's first launch
         self.main_window: MainWindow = main_window
-
-        self.path = path
-        self.file_type: FileType = get_file_type(file_type)
-        self.full_path = self.path.absolute()
-        self.is_python_file = self.file_type == FileType.Python
-        self.venv = env
-        self._current_file_changed = False        
+        self.loader: FileLoader = None
+        self.auto_completer = None
+        self.completion_scheduler = None
+        self.views: list[SplitView] = [] # other views showing this editor's document
+        self.last_shown = time.monotonic() # when the tab was last the current one
         # EDITOR
-        self.cursorPositionChanged.connect(self.cursorPositionChangedCustom)
         self.textChanged.connect(self.textChangedCustom)
  
         # encoding       
@@ -36,20 +54,17 @@ class Editor(QsciScintilla):
         self.font = QFont("Consolas", 14)
         self.setFont(self.font)
         
-        # brace mactching
-        self.setBraceMatching(QsciScintilla.SloppyBraceMatch)
-
         # indentation
         self.setTabWidth(4)
         self.setIndentationGuides(True)
         self.setIndentationsUseTabs(False) # don't use tabs, otherwise jedi can't work
         self.setAutoIndent(True)
 
-        # autocomplete
-        self.setAutoCompletionSource(QsciScintilla.AcsAPIs)
-        self.setAutoCompletionThreshold(1)
+        # autocomplete, jedi's results are shown straight in scintilla's list (see show_completions)
+        self.setAutoCompletionSource(QsciScintilla.AcsNone)
         self.setAutoCompletionCaseSensitivity(False)
         self.setAutoCompletionUseSingle(QsciScintilla.AcusNever)
+        self.SendScintilla(QsciScintilla.SCI_AUTOCSETORDER, QsciScintilla.SC_ORDER_PERFORMSORT)
 
         self.setCallTipsStyle(QsciScintilla.CallTipsNoContext)
         # Set the number of calltips that will be displayed at one time.
@@ -74,46 +89,11 @@ class Editor(QsciScintilla):
         self.setCaretWidth(2)
         self.setCaretLineBackgroundColor(QColor("#2c313c"))
 
-        # bracket matching colors
-        self.setMatchedBraceBackgroundColor(QColor("#c678dd"))
-        self.setMatchedBraceForegroundColor(QColor("#F2E3E3"))
-
         # EOL
         self.setEolMode(QsciScintilla.EolMode.EolWindows)
         self.setEolVisibility(False)
 
-        if self.file_type == FileType.Python:
-            # lexer
-            self.pylexer = PyCustomLexer(self)
-            # QsciLexerPython
-            self.pylexer.setDefaultFont(self.font)
-
-            # Api AUTOCOMPLETION
-            # API
-            self.__api = QsciAPIs(self.pylexer)
-            # autocompletion_image = QPixmap("./src/icons/close-icon.svg")
-            # self.registerImage(1, autocompletion_image)
-
-            self.auto_completer = AutoCompleter(self.full_path, self.__api)
-            self.auto_completer.finished.connect(self.loaded_autocomp)
-            self.setLexer(self.pylexer)
-
-        elif self.file_type == FileType.Json:
-            self.jsonlexer = JsonLexer(self)
-            self.jsonlexer.setDefaultFont(self.font)
-            self.setLexer(self.jsonlexer)
-        else:
-            # self.lexer = QsciLexer()
-            self.setPaper(QColor("#282c34"))
-            self.setColor(QColor("#abb2bf"))
-            # self.lexer.setDefaultColor("#abb2bf")
-            # self.lexer.setDefaultFont(QFont("Consolas", 14))
-            # self.setLexer(self.lexer)
-
         # style
-        self.setIndentationGuidesBackgroundColor(QColor("#dedcdc"))
-        self.setIndentationGuidesForegroundColor(QColor("#dedcdc"))
-        self.SendScintilla(self.SCI_STYLESETBACK, self.STYLE_DEFAULT, QColor("#282c34"))
         self.setEdgeColor(QColor("#2c313c"))
         self.setEdgeMode(QsciScintilla.EdgeLine)
         self.setWhitespaceBackgroundColor(QColor("#2c313c"))
@@ -129,9 +109,6 @@ class Editor(QsciScintilla):
         # margin 0 = Line nr margin
         self.setMarginType(0, QsciScintilla.NumberMargin)
         self.setMarginWidth(0, "0000")
-        self.setMarginsForegroundColor(QColor("#ff888888"))
-        self.setMarginsBackgroundColor(QColor("#282c34"))
-        self.setMarginsFont(self.font)
 
         # folding
         # self.setMarginType(1, QsciScintilla)
@@ -139,7 +116,6 @@ class Editor(QsciScintilla):
         # self.setMarginMarkerMask(1, 0b1111)
         # self.setMarginSensitivity(1, True)
         self.setFolding(QsciScintilla.BoxedFoldStyle, 1)
-        self.setFoldMarginColors(QColor("#2c313c"), QColor("#2c313c"))
 
         # margin 1 = Symbol margin
         # editor.setMarginType(1, QsciScintilla.SymbolMargin)
@@ -155,7 +131,222 @@ class Editor(QsciScintilla):
 
         self.indicatorDefine(QsciScintilla.SquigglePixmapIndicator, 0)
 
-        
+        self.open(path, file_type, env, large_file)
+
+    def open(self, path: Path, file_type=".py", env=None, large_file=False):
+        """Set the editor up for a file, everything above is the same for every file"""
+        self.first_launch = True # variable to keep track of if it's first launch
+        self.path = path
+        self.file_type: FileType = get_file_type(file_type)
+        self.full_path = self.path.absolute()
+        self.is_python_file = self.file_type == FileType.Python
+        self.venv = env
+        self._current_file_changed = False        
+        # large files are loaded in chunks and start without lexing, completion and brace matching
+        self.large_file = large_file
+        self.language_enabled = False
+        self.hibernated = False # lexer and completion dropped while the tab was in the background
+        self.change_count = 0 # tells a save of the current text from a save of an older one
+        self.disk_signature = None # of the file as this editor last wrote or read it, see FileWatcher.signature
+
+        if large_file:
+            self.set_plain_colors()
+            self.set_colors()
+        else:
+            self.set_up_language()
+
+    def set_colors(self):
+        """Colors kept in scintilla's styles, changing the lexer resets them"""
+        self.setIndentationGuidesBackgroundColor(QColor("#dedcdc"))
+        self.setIndentationGuidesForegroundColor(QColor("#dedcdc"))
+        self.SendScintilla(self.SCI_STYLESETBACK, self.STYLE_DEFAULT, QColor("#282c34"))
+        # bracket matching colors
+        self.setMatchedBraceBackgroundColor(QColor("#c678dd"))
+        self.setMatchedBraceForegroundColor(QColor("#F2E3E3"))
+        self.setMarginsForegroundColor(QColor("#ff888888"))
+        self.setMarginsBackgroundColor(QColor("#282c34"))
+        self.setMarginsFont(self.font)
+        self.setFoldMarginColors(QColor("#2c313c"), QColor("#2c313c"))
+
+    def set_up_language(self):
+        """Lexer, autocompletion and brace matching for the file type"""
+        self.language_enabled = True
+        # brace mactching
+        self.setBraceMatching(QsciScintilla.SloppyBraceMatch)
+
+        if self.file_type == FileType.Python:
+            # lexer, tree sitter when it's available and the regex lexer otherwise
+            self.pylexer = TreeSitterLexer.for_file_type(self, self.file_type) or PyCustomLexer(self)
+            # QsciLexerPython
+            self.pylexer.setDefaultFont(self.font)
+
+            # autocompletion_image = QPixmap("./src/icons/close-icon.svg")
+            # self.registerImage(1, autocompletion_image)
+
+            self.main_window.start_completion()
+            if self.main_window.completion_server is not None:
+                # jedi runs in the worker processes
+                self.auto_completer = RemoteCompleter(
+                    self.full_path, self.main_window.completion_server, self
+                )
+            else:
+                self.auto_completer = AutoCompleter(self.full_path, self.main_window.jedi_project)
+            self.completion_scheduler = CompletionScheduler(self.auto_completer, self.text)
+            self.completion_scheduler.completions_ready.connect(self.show_completions)
+            self.setLexer(self.pylexer)
+
+        elif self.file_type == FileType.Json:
+            self.jsonlexer = TreeSitterLexer.for_file_type(self, self.file_type) or JsonLexer(self)
+            self.jsonlexer.setDefaultFont(self.font)
+            self.setLexer(self.jsonlexer)
+        else:
+            self.set_plain_colors()
+        self.set_colors()
+        for view in self.views:
+            view.follow_source()
+
+    def drop_language(self):
+        """Undo set_up_language, the lexer and the completer go away"""
+        self.language_enabled = False
+        self.setBraceMatching(QsciScintilla.NoBraceMatch)
+        if self.completion_scheduler is not None:
+            self.completion_scheduler.timer.stop()
+            self.completion_scheduler.deleteLater()
+            self.completion_scheduler = None
+        if self.auto_completer is not None:
+            completer = self.auto_completer
+            self.auto_completer = None
+            completer.close_document()
+            if completer.isRunning():
+                # a thread can't go away while it runs, the window holds on to it until it's done
+                completer.setParent(self.main_window)
+                completer.finished.connect(completer.deleteLater)
+            else:
+                completer.deleteLater()
+        lexer = self.lexer()
+        if lexer is not None:
+            self.setLexer(None)
+            lexer.deleteLater()
+        self.pylexer = self.jsonlexer = None
+        self.set_plain_colors()
+        self.set_colors()
+        for view in self.views:
+            view.follow_source()
+
+    def hibernate(self):
+        """Drop the lexer and completion of a tab that's been in the background for a while"""
+        if not self.language_enabled or self.loader is not None or self.views:
+            # split views may still be showing it
+            return
+        self.drop_language()
+        self.hibernated = True
+
+    def wake(self):
+        """Bring back what hibernate dropped, styling starts over from what's on screen"""
+        if self.hibernated:
+            self.hibernated = False
+            self.set_up_language()
+
+    def release(self):
+        """Forget the file so the editor can be opened again with another one"""
+        if self.loader is not None:
+            loader = self.loader
+            for signal in (loader.chunk_read, loader.failed, loader.finished):
+                signal.disconnect()
+            loader.requestInterruption()
+            loader.wait()
+            self.loader = None
+        for signal in (self.load_progress, self.load_finished):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass # nothing connected
+        self.drop_language()
+        self.first_launch = True
+        self.setReadOnly(False)
+        self.setText("")
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, True)
+
+    def set_plain_colors(self):
+        # self.lexer = QsciLexer()
+        self.setPaper(QColor("#282c34"))
+        self.setColor(QColor("#abb2bf"))
+        # self.lexer.setDefaultColor("#abb2bf")
+        # self.lexer.setDefaultFont(QFont("Consolas", 14))
+        # self.setLexer(self.lexer)
+
+    def enable_language_features(self):
+        """Turn on what large file mode left off, styling a big file can take a while"""
+        if self.language_enabled or self.loader is not None:
+            return
+        self.set_up_language()
+        self.main_window.statusBar().showMessage(f"Enabled highlighting for {self.path.name}", 2000)
+
+    def load(self):
+        """Read the file in the background, the editor is read only until it's all there"""
+        self.loader = FileLoader(self.path)
+        self.loader.chunk_read.connect(self.append_chunk)
+        self.loader.failed.connect(self.load_failed)
+        self.loader.finished.connect(self.loading_finished)
+        self.setReadOnly(True)
+        # loading isn't something to undo
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, False)
+        self.loader.start()
+
+    def append_chunk(self, data: bytes, read: int):
+        # read only blocks appending too
+        self.setReadOnly(False)
+        self.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(data), data)
+        self.setReadOnly(True)
+        self.loader.chunk_done()
+        self.load_progress.emit(read, self.loader.total)
+
+    def load_failed(self, err: str):
+        print("Load Error:", err)
+        self.main_window.statusBar().showMessage(f"Failed to read {self.path.name}", 2000)
+
+    def loading_finished(self):
+        self.loader = None
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, True)
+        self.setReadOnly(False)
+        self.first_launch = False
+        self.load_finished.emit()
+
+    def stop_loading(self):
+        if self.loader is not None:
+            self.loader.requestInterruption()
+
+    def reload(self, text: str) -> bool:
+        """Replace the text with what's on disk now, only the part that changed is replaced
+        so the cursor, the scroll position and the styling of the rest stay. False if nothing changed"""
+        old = self.text().encode("utf-8")
+        new = text.encode("utf-8")
+        if old == new:
+            return False
+        start = common_prefix(old, new)
+        end = common_prefix(old[start:][::-1], new[start:][::-1])
+        # don't cut a character in half
+        while start > 0 and start < len(old) and old[start] & 0xC0 == 0x80:
+            start -= 1
+        while end > 0 and old[len(old) - end] & 0xC0 == 0x80:
+            end -= 1
+        middle = new[start:len(new) - end]
+        self.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, len(old) - end)
+        self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(middle), middle)
+        self.current_file_changed = False
+        return True
+
+    def contextMenuEvent(self, e: QContextMenuEvent):
+        menu = self.createStandardContextMenu()
+        if not self.language_enabled:
+            menu.addSeparator()
+            action = menu.addAction("Enable Highlighting and Completion")
+            action.setEnabled(self.loader is None)
+            action.triggered.connect(self.enable_language_features)
+        menu.exec_(e.globalPos())
+        menu.deleteLater()
 
     # UPDATED EP 9
     @property
@@ -165,17 +356,23 @@ class Editor(QsciScintilla):
     # UPDATED EP 9
     @current_file_changed.setter
     def current_file_changed(self, value: bool):
-        curr_indx = self.main_window.tab_view.currentIndex()
-        if value:
+        # saves finish in the background, this tab may not be the current one anymore
+        curr_indx = self.main_window.tab_view.indexOf(self)
+        is_current = curr_indx == self.main_window.tab_view.currentIndex()
+        if curr_indx == -1:
+            pass
+        elif value:
             self.main_window.tab_view.setTabText(curr_indx, "*" + self.path.name)
-            self.main_window.setWindowTitle(f"*{self.path.name} - {self.main_window.app_name}")
+            if is_current:
+                self.main_window.setWindowTitle(f"*{self.path.name} - {self.main_window.app_name}")
         else:
             if self.main_window.tab_view.tabText(curr_indx).startswith("*"):
                 self.main_window.tab_view.setTabText(
                     curr_indx, 
                     self.main_window.tab_view.tabText(curr_indx)[1:]
                 )
-                self.main_window.setWindowTitle(self.main_window.windowTitle()[1:])
+                if is_current and self.main_window.windowTitle().startswith("*"):
+                    self.main_window.setWindowTitle(self.main_window.windowTitle()[1:])
 
         self._current_file_changed = value
 
@@ -201,10 +398,9 @@ class Editor(QsciScintilla):
 
     def keyPressEvent(self, e: QKeyEvent) -> None:
         if e.modifiers() == Qt.ControlModifier and e.key() == Qt.Key_Space:
-            if self.is_python_file:
+            if self.completion_scheduler is not None:
                 pos = self.getCursorPosition()
-                self.auto_completer.get_completion(pos[0]+1, pos[1], self.text())
-                self.autoCompleteFromAPIs()
+                self.completion_scheduler.request(pos[0]+1, pos[1], immediate=True, view=self)
                 return
 
         # UPDATED EP 9
@@ -230,18 +426,167 @@ class Editor(QsciScintilla):
             
             return 
 
-        return super().keyPressEvent(e)
-
-    def cursorPositionChangedCustom(self, line: int, index: int) -> None:
-        if self.is_python_file:
-            self.auto_completer.get_completion(line+1, index, self.text())
-
-    def loaded_autocomp(self):
-        pass
+        super().keyPressEvent(e)
+
+        # only typing asks for completions, moving the caret around doesn't
+        if self.completion_scheduler is not None and is_completion_trigger(e.text()):
+            line, index = self.getCursorPosition()
+            self.completion_scheduler.request(line+1, index, view=self)
+
+    def show_completions(self, line: int, index: int, names: list[str]):
+        """Show completions in scintilla's autocompletion list, nothing is prepared up front"""
+        if self.completion_scheduler.issued_view not in (None, self):
+            # asked for in another view of the file
+            return
+        # the caret moved away since the completions were asked for
+        if not names or self.getCursorPosition() != (line-1, index):
+            return
+        # length in bytes of the word being completed, scintilla replaces it
+        word = re.search(r"\w*$", self.text(line-1)[:index]).group()
+        self.SendScintilla(QsciScintilla.SCI_AUTOCSHOW, len(word.encode()), " ".join(names).encode())
+        if metrics.enabled and self.completion_scheduler.issued_since is not None:
+            # from the keystroke to the list being shown
+            metrics.record("completion.latency", time.perf_counter() - self.completion_scheduler.issued_since)
 
     # UPDATED EP 9
     def textChangedCustom(self) -> None:
+        if self.loader is not None:
+            # chunks of the file coming in
+            return
+        self.change_count += 1
+        if self.completion_scheduler is not None:
+            self.completion_scheduler.text_changed()
         if not self.current_file_changed and not self.first_launch:
             self.current_file_changed = True
         if self.first_launch:
             self.first_launch = False
+
+
+class SplitView(Editor):
+    """Another view of an editor's file, in a pane next to the tabs.
+
+    The view displays the editor's own scintilla document (QsciDocument
+    shares it with SCI_GETDOCPOINTER and SCI_ADDREFDOCUMENT) so the text
+    and undo history are kept once. The document's styling is shared as
+    well, the editor's lexer styles for every view and its completion
+    session answers every view. Edits made here reach the editor through
+    the document, its modified state and saving work as usual.
+    """
+
+    def __init__(self, source: Editor):
+        self.source = source
+        super(SplitView, self).__init__(source.main_window, path=source.path, file_type=source.path.suffix)
+        self.setDocument(source.document())
+        # the view asks for styling when it paints, the source's lexer does it
+        self.SCN_STYLENEEDED.connect(self.style_needed)
+        source.views.append(self)
+        self.follow_source()
+
+    def open(self, path: Path, file_type=".py", env=None, large_file=False):
+        # what Editor.open sets up belongs to the source, the view only reads
+        self.first_launch = False
+        self.path = path
+        self.full_path = path.absolute()
+        self.file_type: FileType = get_file_type(file_type)
+        self.language_enabled = False
+        self.hibernated = False
+        self.set_plain_colors()
+        self.set_colors()
+
+    def follow_source(self):
+        """Use the source's lexer styles and completion, call after they change"""
+        if self.completion_scheduler is not None:
+            self.completion_scheduler.completions_ready.disconnect(self.show_completions)
+        self.completion_scheduler = self.source.completion_scheduler
+        if self.completion_scheduler is not None:
+            self.completion_scheduler.completions_ready.connect(self.show_completions)
+
+        self.setBraceMatching(QsciScintilla.SloppyBraceMatch if self.source.language_enabled else QsciScintilla.NoBraceMatch)
+        lexer = self.source.lexer()
+        if lexer is None:
+            self.set_plain_colors()
+        else:
+            # style definitions are kept per view, only the styled text is shared
+            for style in range(QsciScintilla.STYLE_DEFAULT):
+                if style != lexer.DEFAULT and not lexer.description(style):
+                    continue
+                font = lexer.font(style)
+                self.SendScintilla(QsciScintilla.SCI_STYLESETFORE, style, lexer.color(style))
+                self.SendScintilla(QsciScintilla.SCI_STYLESETBACK, style, lexer.paper(style))
+                self.SendScintilla(QsciScintilla.SCI_STYLESETFONT, style, font.family().encode())
+                self.SendScintilla(QsciScintilla.SCI_STYLESETSIZE, style, font.pointSize())
+                self.SendScintilla(QsciScintilla.SCI_STYLESETBOLD, style, font.bold())
+                self.SendScintilla(QsciScintilla.SCI_STYLESETITALIC, style, font.italic())
+        self.set_colors()
+
+    def style_needed(self, pos: int):
+        # what QsciLexerCustom does for its own editor
+        lexer = self.source.lexer()
+        if lexer is None:
+            return
+        start = self.SendScintilla(QsciScintilla.SCI_GETENDSTYLED)
+        line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        if start != pos:
+            lexer.styleText(start, pos)
+
+    def textChangedCustom(self) -> None:
+        # the source counts the changes, it sees every edit made here too
+        pass
+
+    def contextMenuEvent(self, e: QContextMenuEvent):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        action = menu.addAction("Close Split")
+        action.triggered.connect(lambda: self.main_window.close_split(self))
+        menu.exec_(e.globalPos())
+        menu.deleteLater()
+
+    def detach(self):
+        """Stop following the source, the view is going away"""
+        self.SCN_STYLENEEDED.disconnect(self.style_needed)
+        if self.completion_scheduler is not None:
+            self.completion_scheduler.completions_ready.disconnect(self.show_completions)
+            if self.completion_scheduler.issued_view is self:
+                self.completion_scheduler.issued_view = None
+            self.completion_scheduler = None
+        self.source.views.remove(self)
+
+
+class TabPlaceholder(QWidget):
+    """Stands in for an editor in a tab that hasn't been shown yet.
+
+    Only the file and where to scroll to are kept, the editor is built and
+    the file read the first time the tab becomes the current one.
+    """
+
+    # what the window checks on every tab
+    loader = None
+    auto_completer = None
+    current_file_changed = False
+    views = ()
+
+    def __init__(self, path: Path, first_line: int = 0, cursor: tuple[int, int] = (0, 0)):
+        super(TabPlaceholder, self).__init__(None)
+        self.path = path
+        self.full_path = path.absolute()
+        self.first_line = first_line
+        self.cursor = cursor
+
+
+class EditorPool:
+    """Closed editors kept to open other files with, a new Editor takes a lot of setup"""
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self.editors: list[Editor] = []
+
+    def take(self) -> Editor:
+        return self.editors.pop() if self.editors else None
+
+    def put(self, editor: Editor):
+        editor.release()
+        if len(self.editors) < self.size:
+            self.editors.append(editor)
+        else:
+            editor.deleteLater()
@@ -0,0 +1,82 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pathlib import Path
+import json
+import os
+import tempfile
+
+CACHE_FILE = Path.home() / ".neutron" / "environments.json"
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as err:
+        print("Environment Cache Error:", err)
+        return {}
+
+
+def save_cache(cache: dict):
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # finders of folders opened one after the other can save at the same time
+        fd, tmp = tempfile.mkstemp(prefix=CACHE_FILE.stem + ".", suffix=".tmp", dir=CACHE_FILE.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, CACHE_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    except OSError as err:
+        print("Environment Cache Error:", err)
+
+
+class EnvironmentFinder(QThread):
+    """Looks for the virtualenvs of a folder with jedi in the background.
+
+    The executables found are saved along with the folder's mtime, while
+    the folder hasn't changed the next start only creates those again
+    instead of checking every folder in it.
+    """
+
+    found = pyqtSignal(str, list) # root, jedi environments
+
+    def __init__(self, root):
+        super(EnvironmentFinder, self).__init__(None)
+        self.root = str(Path(root).resolve())
+
+    def key(self) -> str:
+        # jedi also picks up the active virtualenv or conda env
+        return "|".join([self.root, os.environ.get("VIRTUAL_ENV", ""), os.environ.get("CONDA_PREFIX", "")])
+
+    def run(self):
+        import jedi
+
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            mtime = None
+        cache = load_cache()
+        entry = cache.get(self.key())
+
+        envs = None
+        if entry is not None and entry["mtime"] == mtime:
+            try:
+                envs = [jedi.create_environment(exe) for exe in entry["executables"]]
+            except jedi.InvalidPythonEnvironment:
+                # removed or broken since, look again
+                envs = None
+
+        if envs is None:
+            envs = list(jedi.find_virtualenvs(paths=[self.root]))
+            cache[self.key()] = {"mtime": mtime, "executables": [env.executable for env in envs]}
+            save_cache(cache)
+
+        self.found.emit(self.root, envs)
@@ -0,0 +1,57 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pathlib import Path
+import threading
+
+LARGE_FILE_SIZE = 8 * 1024 * 1024 # files this big are opened in large file mode
+
+
+class FileLoader(QThread):
+    """Reads a file in chunks off the gui thread for large file mode.
+
+    The first chunk is small so the editor has something to show right
+    away. Line endings are turned into \\n like reading in text mode does.
+    """
+
+    chunk_read = pyqtSignal(bytes, int) # chunk, bytes read so far
+    failed = pyqtSignal(str)
+
+    FIRST_CHUNK = 64 * 1024
+    CHUNK_SIZE = 4 * 1024 * 1024
+    IN_FLIGHT = 2 # chunks read ahead of the editor, keeps a slow editor from piling up the whole file
+
+    def __init__(self, path: Path):
+        super(FileLoader, self).__init__(None)
+        self.path = path
+        self.total = path.stat().st_size
+        self.slots = threading.Semaphore(self.IN_FLIGHT)
+
+    def run(self):
+        read = 0
+        carry = b""
+        size = self.FIRST_CHUNK
+        try:
+            with open(self.path, "rb") as f:
+                while not self.isInterruptionRequested():
+                    chunk = f.read(size)
+                    size = self.CHUNK_SIZE
+                    read += len(chunk)
+                    data = carry + chunk
+                    carry = b""
+                    if chunk and data.endswith(b"\r"):
+                        # the \n of a \r\n may be in the next chunk
+                        carry = b"\r"
+                        data = data[:-1]
+                    if data:
+                        while not self.slots.acquire(timeout=0.1):
+                            if self.isInterruptionRequested():
+                                return
+                        self.chunk_read.emit(data.replace(b"\r\n", b"\n").replace(b"\r", b"\n"), read)
+                    if not chunk:
+                        return
+        except OSError as err:
+            self.failed.emit(str(err))
+
+    def chunk_done(self):
+        """The editor took a chunk, another one can be read"""
+        self.slots.release()
@@ -13,11 +13,11 @@ from PyQt5.QtCore import Qt, QDir, QModelIndex, QPoint
 from PyQt5.QtGui import QFont, QIcon, QDropEvent, QDragEnterEvent
 
 from pathlib import Path
-import shutil
 import os
 import subprocess
 
-from editor import Editor
+from file_operations import FileOperations, FileJob
+
 
 if TYPE_CHECKING:
     from main import MainWindow
@@ -77,6 +77,12 @@ class FileManager(QTreeView):
         # enable file name editing
         self.itemDelegate().closeEditor.connect(self._on_closeEditor)
 
+        # copies, moves and deletes run in the background, one after the other
+        self.operations = FileOperations()
+        self.operations.progress.connect(self.operation_progress)
+        self.operations.done.connect(self.operation_done)
+        self.deleting: dict[FileJob, list] = {} # job -> editors of the files it deletes
+
     def _on_closeEditor(self, editor: QLineEdit):
         if self.is_renaming:
             self.is_editing = False
@@ -136,21 +142,23 @@ class FileManager(QTreeView):
         if self.previous_rename_name == new_name:
             return
         
-        for editor in self.tab_view.findChildren(Editor):
-            if editor.path.name == self.previous_rename_name:
-                editor.path = editor.path.parent / new_name
-                editor_index = self.tab_view.indexOf(editor)
-                prev_tab_name = self.tab_view.tabText(editor_index)
-                new_tab_name = "*"+new_name if prev_tab_name.startswith("*") else new_name # add star on new tab name if file was unsaved
-                self.tab_view.setTabText(
-                    self.tab_view.indexOf(editor), new_tab_name 
-                )
-                if self.main_window.tab_view.currentWidget() == editor:
-                    self.main_window.setWindowTitle(f"{new_tab_name} - {self.main_window.app_name}")
-                self.tab_view.repaint()
-                editor.full_path = editor.path.absolute()
+        new_path = Path(self.model.filePath(self.current_edit_index))
+        old_path = new_path.parent / self.previous_rename_name
+        self.follow_moved(old_path, new_path)
+
+    def follow_moved(self, old_path: Path, new_path: Path):
+        """Tabs of the files that were at old_path and are at new_path now"""
+        for editor, path in self.main_window.documents.moved(old_path, new_path):
+            editor.path = path
+            editor_index = self.tab_view.indexOf(editor)
+            prev_tab_name = self.tab_view.tabText(editor_index)
+            new_tab_name = "*"+path.name if prev_tab_name.startswith("*") else path.name # add star on new tab name if file was unsaved
+            self.tab_view.setTabText(editor_index, new_tab_name)
+            if self.main_window.tab_view.currentWidget() == editor:
+                self.main_window.setWindowTitle(f"{new_tab_name} - {self.main_window.app_name}")
                 self.main_window.current_file = editor.path
-                break
+            editor.full_path = editor.path.absolute()
+        self.tab_view.repaint()
 
     def action_rename(self, ix: QModelIndex):
         # UPDATED EP 8
@@ -160,11 +168,39 @@ class FileManager(QTreeView):
         self.current_edit_index = ix
 
     def delete_path(self, path: Path):
-        """delete file or folder with path"""
-        if path.is_dir():
-            shutil.rmtree(path)
+        """delete file or folder with path in the background, its tabs are closed once it's gone"""
+        # before it's gone, the registry resolves the path
+        editors = self.main_window.documents.under(path)
+        job = self.operations.add("delete", path)
+        self.deleting[job] = editors
+
+    def operation_progress(self, job: FileJob):
+        pending = self.operations.pending()
+        text = job.describe() + (f", {pending} more queued" if pending else "")
+        self.main_window.operation_label.setText(text)
+        self.main_window.operation_label.show()
+        self.main_window.operation_cancel.show()
+
+    def operation_done(self, job: FileJob, error: str):
+        if job.kind == "delete":
+            for editor in self.deleting.pop(job, []):
+                # a delete that was cut short may have left some of them, and the tab may be closed already
+                if editor in self.main_window.documents.keys and not editor.path.exists():
+                    self.main_window.close_editor(editor)
+        elif job.kind == "move" and not error:
+            self.follow_moved(job.source, job.target)
+
+        verb = job.VERBS[job.kind][0].lower()
+        if error == "Cancelled":
+            self.main_window.statusBar().showMessage(f"Stopped {verb} {job.source.name} after {job.files} files", 3000)
+        elif error:
+            print("File Operation Error:", error)
+            self.main_window.statusBar().showMessage(f"Error {verb} {job.source.name}: {error}", 5000)
         else:
-            path.unlink()
+            self.main_window.statusBar().showMessage(job.describe(), 3000)
+        if self.operations.pending() == 0:
+            self.main_window.operation_label.hide()
+            self.main_window.operation_cancel.hide()
 
     def action_delete(self, ix):
         # check if selection is more
@@ -175,13 +211,7 @@ class FileManager(QTreeView):
         if dialog == QMessageBox.Yes:
             if self.selectionModel().hasSelection():
                 for i in self.selectionModel().selectedRows():
-                    path = Path(self.model.filePath(i))
-                    self.delete_path(path)
-                    for editor in self.tab_view.findChildren(Editor):
-                        if editor.path.name == path.name:
-                            self.tab_view.removeTab(
-                                self.tab_view.indexOf(editor)
-                            )
+                    self.delete_path(Path(self.model.filePath(i)))
 
     def action_new_file(self, ix: QModelIndex):
         # UPDATED EP 9
@@ -244,17 +274,17 @@ class FileManager(QTreeView):
             for url in e.mimeData().urls():
                 path = Path(url.toLocalFile())
                 if path.is_dir():
-                    shutil.copytree(path, root_path / path.name)
+                    self.operations.add("copy", path, root_path / path.name)
                 else:
                     if root_path.samefile(self.model.rootPath()):
                         idx: QModelIndex = self.indexAt(e.pos())
                         if idx.column() == -1:
-                            shutil.move(path, root_path / path.name)
+                            self.operations.add("move", path, root_path / path.name)
                         else:
                             folder_path = Path(self.model.filePath(idx))
-                            shutil.move(path, folder_path / path.name)
+                            self.operations.add("move", path, folder_path / path.name)
                     else:
-                        shutil.copy(path, root_path / path.name)
+                        self.operations.add("copy", path, root_path / path.name)
                         
         e.accept()
 
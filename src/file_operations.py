@@ -0,0 +1,214 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from collections import deque
+from pathlib import Path
+import errno
+import os
+import shutil
+import threading
+import time
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _raise(err: OSError):
+    raise err
+
+
+class FileJob:
+    """A copy, move or delete, the worker counts what it has done so far in files and bytes"""
+
+    VERBS = {"copy": ("Copying", "Copied"), "move": ("Moving", "Moved"), "delete": ("Deleting", "Deleted")}
+
+    def __init__(self, kind: str, source: Path, target: Path = None):
+        self.kind = kind
+        self.source = source
+        self.target = target
+        self.files = 0
+        self.bytes = 0
+        self.started: float = None
+        self.finished: float = None
+        self.cancelled = False
+
+    def describe(self) -> str:
+        """What it's doing, how much of it is done and how fast, for the status bar"""
+        verb = self.VERBS[self.kind][self.finished is not None]
+        text = f"{verb} {self.source.name}: {self.files} files, {self.bytes / 1_000_000:.1f}MB"
+        if self.started is not None:
+            elapsed = max((self.finished or time.monotonic()) - self.started, 1e-3)
+            text += f" ({self.files / elapsed:.0f} files/s, {self.bytes / elapsed / 1_000_000:.1f}MB/s)"
+        return text
+
+
+class FileOperations(QThread):
+    """Copies, moves and deletes files on a background thread, one job at a time.
+
+    The running job stops at the next file or at the next chunk of a big
+    file once it's cancelled. A cancelled or failed copy removes what it
+    had copied, a delete can't bring back what it already deleted. Moving
+    to another drive is a copy and a delete, once the copy is done the
+    delete isn't stopped anymore so the files are always whole in one of
+    the two places.
+    """
+
+    progress = pyqtSignal(object) # the running FileJob
+    done = pyqtSignal(object, str) # job, error, empty when it worked
+
+    CHUNK_SIZE = 1024 * 1024
+    PROGRESS_INTERVAL = 0.1 # seconds between progress signals
+
+    def __init__(self):
+        super(FileOperations, self).__init__(None)
+        self.jobs: deque[FileJob] = deque()
+        self.current: FileJob = None
+        self.cond = threading.Condition()
+        self.stopping = False
+        self.last_progress = 0
+        self.start()
+
+    def add(self, kind: str, source: Path, target: Path = None) -> FileJob:
+        """Queue a job, kind is copy, move or delete"""
+        job = FileJob(kind, Path(source), Path(target) if target is not None else None)
+        with self.cond:
+            self.jobs.append(job)
+            self.cond.notify()
+        return job
+
+    def pending(self) -> int:
+        return len(self.jobs)
+
+    def cancel(self):
+        """Stop the running job and drop the queued ones"""
+        with self.cond:
+            dropped = list(self.jobs)
+            self.jobs.clear()
+            if self.current is not None:
+                self.current.cancelled = True
+        for job in dropped:
+            job.cancelled = True
+            self.done.emit(job, "Cancelled")
+
+    def shutdown(self):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        self.cancel()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.jobs and not self.stopping:
+                    self.cond.wait()
+                if self.stopping:
+                    return
+                job = self.current = self.jobs.popleft()
+
+            job.started = self.last_progress = time.monotonic()
+            error = ""
+            try:
+                if job.kind == "copy":
+                    self.copy(job)
+                elif job.kind == "move":
+                    self.move(job)
+                else:
+                    self.remove(job, job.source)
+            except Cancelled:
+                error = "Cancelled"
+            except OSError as err:
+                error = str(err)
+            job.finished = time.monotonic()
+            with self.cond:
+                self.current = None
+            self.done.emit(job, error)
+
+    def check(self, job: FileJob):
+        """Stop if the job was cancelled, send its progress now and then"""
+        if job.cancelled:
+            raise Cancelled()
+        now = time.monotonic()
+        if now - self.last_progress >= self.PROGRESS_INTERVAL:
+            self.last_progress = now
+            self.progress.emit(job)
+
+    def check_target(self, job: FileJob):
+        if os.path.lexists(job.target):
+            raise FileExistsError(f"{job.target} already exists")
+
+    def copy_file(self, job: FileJob, src: str, dst: str) -> str:
+        """shutil.copy2 a chunk at a time, a big file can be cancelled and counted while it's copied"""
+        # empty files have no chunks, a tree of small ones has to stop too
+        self.check(job)
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            while True:
+                chunk = fsrc.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                fdst.write(chunk)
+                job.bytes += len(chunk)
+                self.check(job)
+        shutil.copystat(src, dst)
+        job.files += 1
+        return dst
+
+    def copy(self, job: FileJob):
+        self.check_target(job)
+        copy_file = lambda src, dst: self.copy_file(job, src, dst)
+        try:
+            if job.source.is_dir():
+                shutil.copytree(job.source, job.target, copy_function=copy_file)
+            else:
+                copy_file(job.source, job.target)
+        except BaseException:
+            # no half copied folders or files left behind
+            if os.path.lexists(job.target):
+                try:
+                    self.remove(None, job.target)
+                except OSError as err:
+                    print("File Operation Error:", err)
+            raise
+
+    def move(self, job: FileJob):
+        self.check_target(job)
+        try:
+            os.rename(job.source, job.target)
+            job.files += 1
+            return
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+        # another drive, copy it over and delete it here
+        self.copy(job)
+        self.remove(None, job.source)
+
+    def remove(self, job: FileJob, path: Path):
+        """shutil.rmtree that counts what it deletes into job and stops when job is cancelled,
+        without a job it's neither counted nor stopped"""
+        def removed(size):
+            if job is not None:
+                job.files += 1
+                job.bytes += size
+                self.check(job)
+
+        if os.path.islink(path) or not os.path.isdir(path):
+            size = os.lstat(path).st_size
+            os.unlink(path)
+            removed(size)
+            return
+
+        for root, dirs, files in os.walk(path, topdown=False, onerror=_raise):
+            for name in files:
+                file_path = os.path.join(root, name)
+                size = os.lstat(file_path).st_size
+                os.unlink(file_path)
+                removed(size)
+            for name in dirs:
+                # links to folders are listed with the folders but not walked into
+                dir_path = os.path.join(root, name)
+                if os.path.islink(dir_path):
+                    os.unlink(dir_path)
+                else:
+                    os.rmdir(dir_path)
+        os.rmdir(path)
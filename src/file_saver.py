@@ -0,0 +1,93 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import os
+import stat
+import tempfile
+import threading
+
+# umask can only be read by setting it, done once here before other threads exist
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def write_atomic(path: str, data: bytes):
+    """Write data to a temp file next to path, fsync it and move it over path
+
+    A crash leaves either the old file or the new one, never half of it.
+    """
+    path = os.path.realpath(path) # replace the target of a symlink, not the link
+    folder, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+    if os.name == "posix":
+        # the rename is only durable once the folder is synced
+        dir_fd = os.open(folder, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class FileSaver(QThread):
+    """Writes files on a background thread.
+
+    Only the latest snapshot of a file waiting to be written is kept, saving
+    the same file again before the last save started just replaces it.
+    """
+
+    saved = pyqtSignal(str, int) # path, token of the snapshot
+    failed = pyqtSignal(str, str) # path, error
+
+    def __init__(self):
+        super(FileSaver, self).__init__(None)
+        self.pending: dict[str, tuple[bytes, int]] = {} # path -> (data, token)
+        self.cond = threading.Condition()
+        self.stopping = False
+        self.start()
+
+    def save(self, path: str, data: bytes, token: int = 0):
+        with self.cond:
+            self.pending[path] = (data, token)
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                path = next(iter(self.pending))
+                data, token = self.pending.pop(path)
+
+            try:
+                write_atomic(path, data)
+            except OSError as err:
+                print("Save Error:", err)
+                self.failed.emit(path, str(err))
+                continue
+            self.saved.emit(path, token)
+
+    def shutdown(self):
+        """Write everything that's pending and stop"""
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+        self.wait()
@@ -0,0 +1,150 @@
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+import os
+import time
+
+
+class FileWatcher(QObject):
+    """Watches folders and files and sends their changes in batches.
+
+    QFileSystemWatcher (inotify on linux) reports every change on its own,
+    a git checkout touches hundreds of files at once. Changes are collected
+    until none came for DEBOUNCE_MS, or for at most MAX_DELAY_MS, and sent
+    together through changed. Paths QFileSystemWatcher can't take, once the
+    system's watch limit is reached, are polled every POLL_MS instead.
+
+    A folder in a batch had entries added, removed or renamed, it has to be
+    listed again. A file in a batch was written, replaced or removed.
+    """
+
+    changed = pyqtSignal(list, list) # folders, files
+
+    DEBOUNCE_MS = 200
+    MAX_DELAY_MS = 1000
+    POLL_MS = 2000
+
+    def __init__(self, parent=None, poll=False):
+        super(FileWatcher, self).__init__(parent)
+        self.poll_only = poll
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.folder_changed)
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.files: set[str] = set() # watched files, replaced files have to be watched again
+        self.polled: dict[str, tuple] = {} # path -> (is folder, stat signature)
+
+        self.pending_folders: set[str] = set()
+        self.pending_files: set[str] = set()
+        self.first_pending = None # when the oldest change in the batch came
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.flush)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+
+    @staticmethod
+    def signature(path: str) -> tuple:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def watch_folders(self, paths: list[str]):
+        self.add(paths, True)
+
+    def watch_files(self, paths: list[str]):
+        self.files.update(paths)
+        self.add(paths, False)
+
+    def add(self, paths: list[str], is_folder: bool):
+        """Watch paths, the ones that exist but can't be watched are polled. Files that
+        don't exist yet are watched once they're created in a watched folder, see folder_changed"""
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        paths = [p for p in paths if p not in self.polled and p not in watched and os.path.exists(p)]
+        if not paths:
+            return
+        failed = paths if self.poll_only else self.watcher.addPaths(paths)
+        for path in failed:
+            self.polled[path] = (is_folder, self.signature(path))
+        if self.polled and not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def unwatch_files(self, paths: list[str]):
+        for path in paths:
+            self.files.discard(path)
+            self.polled.pop(path, None)
+        watched = [p for p in paths if p in self.watcher.files()]
+        if watched:
+            self.watcher.removePaths(watched)
+
+    def clear_folders(self):
+        """Stop watching every folder, the open files are still watched"""
+        folders = self.watcher.directories()
+        if folders:
+            self.watcher.removePaths(folders)
+        self.polled = {path: entry for path, entry in self.polled.items() if not entry[0]}
+
+    def folder_changed(self, path: str):
+        self.pending_folders.add(path)
+        # files deleted and created again in it, their watch went with the deleted one
+        folder = os.path.normpath(path)
+        watched = set(self.watcher.files())
+        created = [p for p in self.files if os.path.dirname(os.path.normpath(p)) == folder
+                   and p not in watched and p not in self.polled and os.path.exists(p)]
+        if created:
+            self.add(created, False)
+            self.pending_files.update(created)
+        self.schedule()
+
+    def file_changed(self, path: str):
+        self.pending_files.add(path)
+        if path in self.files and path not in self.watcher.files() and os.path.exists(path):
+            # saved by replacing it, the watch went with the old file
+            self.add([path], False)
+        self.schedule()
+
+    def poll(self):
+        if not self.poll_only:
+            # watches freed up since, these don't have to be polled anymore
+            existing = [p for p in self.polled if os.path.exists(p)]
+            failed = set(self.watcher.addPaths(existing)) if existing else set()
+            for path in existing:
+                if path not in failed:
+                    del self.polled[path]
+        for path, (is_folder, signature) in list(self.polled.items()):
+            current = self.signature(path)
+            if current == signature:
+                continue
+            self.polled[path] = (is_folder, current)
+            if is_folder:
+                self.pending_folders.add(path)
+                if current is None:
+                    del self.polled[path]
+            else:
+                self.pending_files.add(path)
+        if not self.polled:
+            self.poll_timer.stop()
+        if self.pending_folders or self.pending_files:
+            self.schedule()
+
+    def schedule(self):
+        now = time.monotonic()
+        if self.first_pending is None:
+            self.first_pending = now
+        if (now - self.first_pending) * 1000 >= self.MAX_DELAY_MS:
+            # changes keep coming, don't hold them back forever
+            self.timer.stop()
+            self.flush()
+        else:
+            self.timer.start()
+
+    def flush(self):
+        folders, self.pending_folders = self.pending_folders, set()
+        files, self.pending_files = self.pending_files, set()
+        self.first_pending = None
+        if folders or files:
+            self.changed.emit(sorted(folders), sorted(files))
@@ -1,89 +1,671 @@
-from PyQt5.QtCore import QThread, pyqtSignal
-from PyQt5.QtWidgets import QListWidgetItem
+from PyQt5.QtCore import QThread, QObject, pyqtSignal, QAbstractListModel, QModelIndex, Qt
 
-import os, re
+import os, re, time, threading, heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from pathlib import Path
 
-class SearchItem(QListWidgetItem):
-    def __init__(self, name, full_path, lineno, end, line):
-        self.name = name
-        self.full_path = full_path
-        self.lineno = lineno
-        self.end = end
-        self.line = line
-        self.formated = f"{self.name}:{self.lineno}:{self.end} - {self.line} ..."
-        super().__init__(self.formated)
-        
+from search_index import TrigramIndex
+from parallel_search import ParallelScanner, compile_pattern, scan_file
+from ignore import IgnoreEngine
+from metrics import metrics
 
-    def __str__(self):
-        return self.formated
+class SearchResultsModel(QAbstractListModel):
+    """Search hits for a QListView.
 
-    def __repr__(self):
-        return self.__str__()
+    Hits are kept by column, every path is stored once and rows only hold
+    its id, the line number, the end column and the matched text. The
+    text shown for a row is built when the view asks for it, so only
+    visible rows are ever formatted.
+    """
+
+    def __init__(self, parent=None):
+        super(SearchResultsModel, self).__init__(parent)
+        self.clear()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths: list[str] = [] # path id -> path
+        self.names: list[str] = [] # path id -> file name
+        self.path_ids: dict[str, int] = {}
+        self.path_col = array("I")
+        self.lines = array("I")
+        self.ends = array("I")
+        self.texts: list[str] = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        return f"{self.names[self.path_col[row]]}:{self.lines[row]}:{self.ends[row]} - {self.texts[row]} ..."
+
+    def add_results(self, results: list[tuple[str, int, int, str]]):
+        """Append (path, line number, end, line) hits"""
+        if not results:
+            return
+        count = len(self.lines)
+        self.beginInsertRows(QModelIndex(), count, count + len(results) - 1)
+        for path, lineno, end, line in results:
+            path_id = self.path_ids.get(path)
+            if path_id is None:
+                path_id = self.path_ids[path] = len(self.paths)
+                self.paths.append(path)
+                self.names.append(os.path.basename(path))
+            self.path_col.append(path_id)
+            self.lines.append(lineno)
+            self.ends.append(end)
+            self.texts.append(line)
+        self.endInsertRows()
+
+    def result(self, row: int) -> tuple[str, int, int]:
+        """Path, line number and end column of the hit at row"""
+        return self.paths[self.path_col[row]], self.lines[row], self.ends[row]
 
 
 class SearchWorker(QThread):
-    # redefine finsihed
-    finished = pyqtSignal(list)
+    """Searches the files of a folder for a regex.
 
-    def __init__(self):
+    Hits are sent in batches through results_found as they're found, tagged
+    with the id update() returned for the search. A new update() cancels
+    the search in progress, it stops at the next file and the thread goes
+    on with the new one.
+    """
+
+    # redefine finsihed, number of hits, only sent for searches that weren't cancelled
+    finished = pyqtSignal(int)
+    results_found = pyqtSignal(int, list) # search id, batch of (path, line number, end, line)
+
+    BATCH_INTERVAL = 0.05 # seconds between batches, the first hit is sent right away
+
+    def __init__(self, workers: int = 0):
         super(SearchWorker, self).__init__(None)
-        self.items = []
+        self.hits = 0
+        # search in a pool of processes instead of this thread
+        self.scanner = ParallelScanner(workers) if workers > 0 else None
+        self.search_text = None
+        self.index_root = None
+        self.opened_root = None
+        self.index: TrigramIndex = None
 
-    def walkdir(self, path, exclude_dirs: list, exclude_files: list):
-        for root, dirs, files in os.walk(path, topdown=True):
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            files[:] = [f for f in files if Path(f).suffix not in exclude_files]
-            yield root, dirs, files
+        self.lock = threading.Lock()
+        self.running = False
+        self.query = None # (search id, pattern, path, search_project) waiting to run
+        self.search_id = 0 # id of the latest search asked for
+        self.current_id = 0 # id of the search being run
 
-    def search(self):
-        debug = False
-        self.items = []
-        current_path = self.search_path
-        exclude_dirs = set([".git", ".svn", ".hg", ".bzr", ".idea", "__pycache__", "venv"])
-        if self.search_project:
-            exclude_dirs.remove("venv")
-        exclude_files = set([".svg", ".png", ".exe", ".pyc", ".qm"])
-        for root, _, files in self.walkdir(current_path, exclude_dirs, exclude_files):
-            if len(self.items) > 5_000: # search limit
-                break
+        self.batch = []
+        self.last_emit = 0
+        self.files_scanned = 0 # only counted while metrics are on
+        self.bytes_scanned = 0
+
+        self.ignores: dict[tuple, IgnoreEngine] = {} # (root, search_project) -> engine
+        # what the file watcher saw change since the index was last brought up to date
+        self.changed_folders: set[str] = set()
+        self.changed_files: set[str] = set()
+
+    def ignore_engine(self, path, search_project=False) -> IgnoreEngine:
+        key = (str(Path(path).resolve()), search_project)
+        engine = self.ignores.get(key)
+        if engine is None:
+            engine = self.ignores[key] = IgnoreEngine(path, keep=("venv",) if search_project else ())
+        return engine
+
+    def walkdir(self, path, search_project=False):
+        """Walk path without the files its ignore files leave out, venv is kept for project searches"""
+        return self.ignore_engine(path, search_project).walk()
+
+    def cancelled(self) -> bool:
+        return self.current_id != self.search_id
+
+    def search_files(self, check_binary=True):
+        """Paths of the files to search, in the order they're walked"""
+        # the index narrows the search down to files that have the pattern's trigrams
+        candidates = self.index.candidates(self.search_text) if self.index is not None else None
+        for root, _, files in self.walkdir(self.search_path, self.search_project):
             for file_ in files:
+                if self.cancelled():
+                    return
                 full_path = os.path.join(root, file_)
-                if self.is_binary(full_path):
+                if self.index is not None:
+                    if not self.index.may_match(full_path, candidates):
+                        continue
+                elif check_binary and self.is_binary(full_path):
                     continue
-                try:
-                    with open(os.path.join(root, file_), "r", encoding="utf-8") as f:
-                        try:
-                            r = re.compile(self.search_text, re.IGNORECASE)
-                            for i, line in enumerate(f):
-                                if m := r.search(line):
-                                    fd = SearchItem(
-                                        file_,
-                                        full_path,
-                                        i,
-                                        m.end(),
-                                        line[m.start():].strip()[:50],
-                                    )
-                                    self.items.append(fd)
-                        except re.error as e:
-                            if debug:
-                                print(e)
-                except UnicodeDecodeError:
-                    print("Failed to open", file_)
-                    continue
-        self.finished.emit(self.items)
+                yield full_path
+
+    def add_result(self, result: tuple[str, int, int, str]):
+        self.hits += 1
+        self.batch.append(result)
+        if time.monotonic() - self.last_emit >= self.BATCH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.results_found.emit(self.current_id, self.batch)
+            self.batch = []
+        self.last_emit = time.monotonic()
+
+    def search(self):
+        self.hits = 0
+        self.batch = []
+        self.last_emit = 0
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        timed = metrics.enabled
+        if timed:
+            began = time.perf_counter()
+        if self.scanner is not None:
+            self.search_parallel()
+        else:
+            self.search_sequential()
+
+        if self.cancelled():
+            return
+        if timed:
+            metrics.record("search.time", time.perf_counter() - began)
+            metrics.count("search.files", self.files_scanned)
+            metrics.count("search.bytes", self.bytes_scanned)
+            metrics.count("search.hits", self.hits)
+        self.flush()
+        self.finished.emit(self.hits)
+
+    def count_scanned(self, path: str):
+        self.files_scanned += 1
+        try:
+            self.bytes_scanned += os.path.getsize(path)
+        except OSError:
+            pass
+
+    def search_sequential(self):
+        try:
+            r = compile_pattern(self.search_text)
+        except re.error:
+            return
+
+        # scan_file skips binary files itself
+        counted = metrics.enabled
+        for full_path in self.search_files(check_binary=False):
+            if counted:
+                self.count_scanned(full_path)
+            for lineno, end, line in scan_file(r, full_path):
+                self.add_result((full_path, lineno, end, line))
+
+    def search_parallel(self):
+        try:
+            compile_pattern(self.search_text)
+        except re.error:
+            return
+
+        # the workers do the binary check themselves, the files are searched while they're walked
+        paths = self.search_files(check_binary=False)
+        if metrics.enabled:
+            paths = self.counted(paths)
+        for batch in self.scanner.scan(self.search_text, paths, self.cancelled):
+            self.hits += len(batch)
+            self.batch.extend(batch)
+            if time.monotonic() - self.last_emit >= self.BATCH_INTERVAL:
+                self.flush()
+
+    def counted(self, paths):
+        for path in paths:
+            self.count_scanned(path)
+            yield path
 
     def run(self):
-        self.search()
-
-    def update(self, pattern, path, search_project):
-        # if self.isRunning():
-        #     self.terminate()
-        self.search_text = pattern
-        self.search_path = path
-        self.search_project = search_project
+        while True:
+            self.open_index()
+            self.apply_changes()
+            with self.lock:
+                query, self.query = self.query, None
+                if (
+                    query is None and self.opened_root == self.index_root
+                    and not self.changed_folders and not self.changed_files
+                ):
+                    self.running = False
+                    return
+            if query is not None:
+                self.current_id, self.search_text, self.search_path, self.search_project = query
+                self.search()
+
+    def wake(self):
+        """Start the thread, a running one picks up the new work itself"""
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+        self.wait() # the last run may not have returned yet
         self.start()
 
+    def open_index(self):
+        """Load the index of index_root, it's built or brought up to date from the files on disk"""
+        self.opened_root = self.index_root
+        if self.index_root is None:
+            return
+        root = Path(self.index_root).resolve()
+        if self.index is not None and self.index.root == root:
+            return
+        self.close_index()
+
+        self.index = TrigramIndex(root)
+        self.index.load()
+        self.index.refresh(
+            os.path.join(r, f) for r, _, files in self.walkdir(self.index_root) for f in files
+        )
+        self.index.save()
+
+    def files_changed(self, folders: list[str], files: list[str]):
+        """The file watcher's changes, the index takes them in before the next search"""
+        with self.lock:
+            self.changed_folders.update(folders)
+            self.changed_files.update(files)
+        self.wake()
+
+    def apply_changes(self):
+        """Update the index with just the folders and files that changed, nothing else is read"""
+        with self.lock:
+            folders, self.changed_folders = self.changed_folders, set()
+            files, self.changed_files = self.changed_files, set()
+        if self.index is None or not (folders or files):
+            return
+
+        engine = self.ignore_engine(self.index_root)
+
+        def indexed_path(path):
+            # the watcher has resolved paths, the index has them under index_root as it was given
+            rel = os.path.relpath(path, self.index.root)
+            if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+                return None, None
+            rel = "" if rel == "." else rel.replace(os.sep, "/")
+            return rel, engine.full_path(rel)
+
+        def index_files(folder, names):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    self.index.update(path)
+                except OSError:
+                    continue
+                present.add(path)
+
+        known = {os.path.dirname(p) for p in self.index.ids}
+        listed = set()
+        present = set()
+        for folder in folders:
+            rel, folder = indexed_path(folder)
+            if folder is None:
+                continue
+            listed.add(folder)
+            dirs, names = engine.list_folder(rel)
+            index_files(folder, names)
+            for name in dirs:
+                if os.path.join(folder, name) not in known:
+                    # a new folder, whatever was put in it before it was watched
+                    for sub, _, files in engine.walk(rel + "/" + name if rel else name):
+                        index_files(sub, files)
+
+        # files that were in the listed folders and aren't anymore
+        for path in [p for p in self.index.ids if os.path.dirname(p) in listed and p not in present]:
+            self.index.remove(path)
+        for path in files:
+            _, path = indexed_path(path)
+            if path in self.index.ids and path not in present:
+                try:
+                    self.index.update(path)
+                except OSError:
+                    self.index.remove(path)
+
+    def close_index(self):
+        if self.index is not None:
+            self.index.save()
+            self.index = None
+
+    def shutdown(self):
+        self.cancel()
+        self.wait()
+        self.close_index()
+        if self.scanner is not None:
+            self.scanner.shutdown()
+
+    def set_root(self, path):
+        """Index the folder at path in the background, searches in it use the index"""
+        self.index_root = path
+        self.wake()
+
+    def update(self, pattern, path, search_project) -> int:
+        """Search for pattern instead of the current search, returns the id of the new search"""
+        with self.lock:
+            self.search_id += 1
+            self.query = (self.search_id, pattern, path, search_project)
+        self.wake()
+        return self.search_id
+
+    def cancel(self):
+        with self.lock:
+            self.search_id += 1
+            self.query = None
+
     def is_binary(self, full_path):
         with open(full_path, "rb") as f:
-            return b"\0" in f.read(1024)
\ No newline at end of file
+            return b"\0" in f.read(1024)
+
+# fzf style scoring
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8 # first letter of a word, after / _ - . or a space
+BONUS_CAMEL = 7 # upper case letter after a lower case one
+BONUS_CONSECUTIVE = 4
+BONUS_BASENAME = 24 # the whole query matched in the file name
+BONUS_NAME_START = 8 # the query starts where the file name does
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+SEPARATORS = "/\\_-. "
+INITIALS = re.compile(r"\n|(?<![^\n_\-. ])[^\n_\-. ]|[A-Z]")
+
+
+def _tightest_match(query: str, lower: str, begin: int) -> int:
+    """Start of the shortest match of query as a subsequence of lower[begin:], -1 if there's none"""
+    pos = begin
+    for c in query:
+        pos = lower.find(c, pos)
+        if pos == -1:
+            return -1
+        pos += 1
+    # walk back from the end of the first match to make it as short as possible
+    for c in reversed(query):
+        pos = lower.rfind(c, begin, pos)
+    return pos
+
+
+def fuzzy_score(query: str, text: str) -> int:
+    """Score of query as a subsequence of text, None when it isn't one. Higher is better"""
+    query = query.lower()
+    lower = text.lower()
+    name_start = max(text.rfind("/"), text.rfind("\\")) + 1
+
+    score = 0
+    start = _tightest_match(query, lower, name_start)
+    if start != -1:
+        score += BONUS_BASENAME
+    else:
+        start = _tightest_match(query, lower, 0)
+        if start == -1:
+            return None
+
+    if start == name_start:
+        score += BONUS_NAME_START
+
+    pos = start
+    prev = -1
+    for c in query:
+        pos = lower.find(c, pos)
+        score += SCORE_MATCH
+        if pos == 0 or text[pos - 1] in SEPARATORS:
+            score += BONUS_BOUNDARY
+        elif text[pos].isupper() and text[pos - 1].islower():
+            score += BONUS_CAMEL
+        if prev != -1:
+            if pos == prev + 1:
+                score += BONUS_CONSECUTIVE
+            else:
+                score -= PENALTY_GAP_START + (pos - prev - 2) * PENALTY_GAP_EXTENSION
+        prev = pos
+        pos += 1
+    # shorter paths win ties
+    return score - len(text) // 16
+
+
+class PathWalker(QThread):
+    walked = pyqtSignal(str, dict) # root, folder -> file names
+
+    def __init__(self, root: str):
+        super(PathWalker, self).__init__(None)
+        self.root = root
+
+    def run(self):
+        self.walked.emit(self.root, walk_folders(IgnoreEngine(self.root), ""))
+
+
+def walk_folders(engine: IgnoreEngine, folder: str) -> dict[str, list[str]]:
+    """Files of folder and every folder under it that isn't ignored, folders are relative to the root"""
+    found = {}
+    for path, _, files in engine.walk(folder.replace(os.sep, "/")):
+        rel = os.path.relpath(path, engine.root)
+        found["" if rel == "." else rel] = files
+    return found
+
+
+class PathIndex(QObject):
+    """Every file under a folder for the quick open finder.
+
+    The folder is walked once in the background, after that just the
+    folders the file watcher reports are listed again. Every folder the
+    index takes in goes out through folders_added to be watched.
+    """
+
+    changed = pyqtSignal()
+    folders_added = pyqtSignal(list) # full paths
+
+    MAX_SCORED = 500 # candidates that get a full score, the best tiers come first
+
+    def __init__(self, parent=None):
+        super(PathIndex, self).__init__(parent)
+        self.root = None
+        self.folders: dict[str, list[str]] = {} # folder relative to root -> file names
+        self.walker: PathWalker = None
+        self.ignores: IgnoreEngine = None
+        self.dirty = True
+
+    def set_root(self, root: str):
+        self.root = str(Path(root).resolve())
+        self.folders = {}
+        # the walker has its own, this one is only used by rescans on the gui thread
+        self.ignores = IgnoreEngine(self.root)
+        self.dirty = True
+
+        self.walker = PathWalker(self.root)
+        self.walker.walked.connect(self.walked)
+        self.walker.start()
+
+    def walked(self, root: str, folders: dict[str, list[str]]):
+        if root != self.root:
+            # walk of a folder that isn't open anymore
+            return
+        self.add_folders(folders)
+
+    def add_folders(self, folders: dict[str, list[str]]):
+        self.folders.update(folders)
+        self.folders_added.emit([os.path.join(self.root, f) for f in folders])
+        self.dirty = True
+        self.changed.emit()
+
+    def folders_changed(self, paths: list[str]):
+        """Folders that had entries added or removed, they're read again"""
+        rescanned = [path for path in paths if self.rescan(path)]
+        if rescanned:
+            self.dirty = True
+            self.changed.emit()
+
+    def rescan(self, path: str) -> bool:
+        """Read the files of a folder again and walk new folders in it, False if it isn't indexed"""
+        if self.root is None:
+            return False
+        folder = os.path.relpath(path, self.root)
+        folder = "" if folder == "." else folder
+        if folder not in self.folders:
+            return False
+
+        if not os.path.isdir(path):
+            prefix = folder + os.sep
+            for f in [f for f in self.folders if f == folder or f.startswith(prefix)]:
+                del self.folders[f]
+        else:
+            dirs, files = self.ignores.list_folder(folder.replace(os.sep, "/"))
+            new_folders = {}
+            for d in dirs:
+                sub = os.path.join(folder, d)
+                if sub not in self.folders:
+                    new_folders.update(walk_folders(self.ignores, sub))
+            self.folders[folder] = files
+            if new_folders:
+                self.folders.update(new_folders)
+                self.folders_added.emit([os.path.join(self.root, f) for f in new_folders])
+        return True
+
+    def build(self):
+        """Join the paths into one string per column so re can look for candidates"""
+        self.paths = [os.path.join(folder, f) for folder, files in self.folders.items() for f in files]
+        names = [f for files in self.folders.values() for f in files]
+        folders = [folder.replace(os.sep, "/") for folder in self.folders]
+        # lower case so the patterns don't need re.IGNORECASE, it's a lot slower
+        self.path_text = "\n".join(self.paths).lower()
+        self.name_text = "\n".join(names).lower()
+        # the letters that start a word or are capitals, UserProfile.py -> up.p
+        self.initials_text = "".join(INITIALS.findall("\n".join(names))).lower()
+        self.folder_text = "\n".join(folders).lower()
+        self.path_starts = self.line_starts(self.paths)
+        self.name_starts = self.line_starts(names)
+        self.initials_starts = self.line_starts(self.initials_text.split("\n"))
+        self.folder_starts = self.line_starts(folders)
+        self.folder_names = self.folder_text.split("\n")
+        # names and initials in sorted order, the ones starting with the query are a bisect away
+        # and the closest ones to it come first: main.py sorts before main_window.py
+        self.sorted_names, self.sorted_name_ids = self.sorted_lines(self.name_text)
+        self.sorted_initials, self.sorted_initials_ids = self.sorted_lines(self.initials_text)
+        # paths are in folder order, folder i has the paths from folder_paths[i] to folder_paths[i+1]
+        self.folder_paths = array("I", [0])
+        self.folder_paths.extend(accumulate(len(files) for files in self.folders.values()))
+        self.dirty = False
+
+    @staticmethod
+    def line_starts(lines: list[str]) -> array:
+        starts = array("I", [0])
+        starts.extend(accumulate(len(line) + 1 for line in lines))
+        starts.pop()
+        return starts
+
+    @staticmethod
+    def sorted_lines(text: str) -> tuple[list[str], array]:
+        lines = text.split("\n")
+        order = sorted(range(len(lines)), key=lines.__getitem__)
+        return [lines[i] for i in order], array("I", order)
+
+    @staticmethod
+    def prefixed(lines: list[str], ids: array, prefix: str, count: int) -> list[int]:
+        """Ids of up to count of the sorted lines that start with prefix"""
+        start = bisect_left(lines, prefix)
+        found = []
+        for k in range(start, min(start + count, len(lines))):
+            if not lines[k].startswith(prefix):
+                break
+            found.append(ids[k])
+        return found
+
+    def named(self, name: str) -> list[int]:
+        """Ids of the files called name, with or without an extension"""
+        lines, ids = self.sorted_names, self.sorted_name_ids
+        found = []
+        for prefix, whole in ((name, True), (name + ".", False)):
+            k = bisect_left(lines, prefix)
+            while k < len(lines) and (lines[k] == prefix if whole else lines[k].startswith(prefix)):
+                found.append(ids[k])
+                k += 1
+        return found
+
+    @staticmethod
+    def subsequence(query: str) -> re.Pattern:
+        # [^\nb]*b goes straight to the next b instead of trying every place before it
+        return re.compile(re.escape(query[0]) + "".join(
+            f"[^\n{re.escape(c)}]*{re.escape(c)}" for c in query[1:]
+        ) + "[^\n]*")
+
+    def find(self, query: str, limit: int = 50) -> list[str]:
+        """The paths, relative to root, that match query best"""
+        if self.dirty:
+            self.build()
+        query = "".join(query.split())
+        if not query:
+            return self.paths[:limit]
+        lower = query.lower().replace(os.sep, "/")
+
+        candidates = {}
+        folder_query, _, name_query = lower.rpartition("/")
+        if folder_query:
+            # the part before the last / is looked for in the folders, there are a lot less of them.
+            # Folders ending in it come first, then the ones with it in them, shorter ones first
+            folders = [
+                bisect_right(self.folder_starts, m.start()) - 1
+                for m in self.subsequence(folder_query).finditer(self.folder_text)
+            ]
+            def folder_rank(folder):
+                name = self.folder_names[folder]
+                if name == folder_query or name.endswith("/" + folder_query):
+                    return 0, len(name)
+                return (1 if folder_query in name else 2), len(name)
+            ranked = sorted((folder_rank(folder), folder) for folder in folders)
+
+            name_pattern = self.subsequence(name_query) if name_query else None
+            most = self.MAX_SCORED
+            for (tier, _), folder in ranked:
+                if tier and candidates and most == self.MAX_SCORED:
+                    # folders ending in what was typed have matches, the rest only fill up the list
+                    most = len(candidates) + limit
+                first, end = self.folder_paths[folder], self.folder_paths[folder + 1]
+                if first == end:
+                    continue
+                if name_pattern is None:
+                    candidates.update(dict.fromkeys(range(first, end)))
+                else:
+                    # the names of a folder's files are next to each other in name_text
+                    text_end = self.name_starts[end] if end < len(self.name_starts) else len(self.name_text)
+                    for m in name_pattern.finditer(self.name_text, self.name_starts[first], text_end):
+                        candidates[bisect_right(self.name_starts, m.start()) - 1] = None
+                if len(candidates) >= most:
+                    break
+        elif name_query:
+            lower = name_query
+            # files called what was typed, then names and initials starting with it are always
+            # scored, whatever the order of the tree. Of a lot of files with the same name the
+            # shortest paths are taken
+            exact = self.named(lower)
+            candidates = dict.fromkeys(heapq.nsmallest(self.MAX_SCORED // 4, exact, key=lambda i: len(self.paths[i])))
+            candidates.update(dict.fromkeys(
+                self.prefixed(self.sorted_names, self.sorted_name_ids, lower, self.MAX_SCORED // 4)
+            ))
+            candidates.update(dict.fromkeys(
+                self.prefixed(self.sorted_initials, self.sorted_initials_ids, lower, self.MAX_SCORED // 4)
+            ))
+
+            subsequence = self.subsequence(lower)
+            # the rest go in tree order, the paths are only looked at when the names don't have enough
+            # and no file is called what was typed
+            tiers = [
+                (re.compile(re.escape(lower) + "[^\n]*"), self.name_text, self.name_starts),
+                (subsequence, self.name_text, self.name_starts),
+                (subsequence, self.path_text, self.path_starts),
+            ]
+            # every tier gets a share, so a common substring can't crowd out the rest. With a file
+            # called what was typed they only fill up the list
+            share = limit if exact else max(1, (self.MAX_SCORED - len(candidates)) // len(tiers))
+            for tier, (pattern, text, starts) in enumerate(tiers):
+                if tier == 2 and (exact or len(candidates) >= limit):
+                    break
+                found = 0
+                for m in pattern.finditer(text):
+                    i = bisect_right(starts, m.start()) - 1
+                    if i not in candidates:
+                        candidates[i] = None
+                        found += 1
+                        if found >= share:
+                            break
+
+        query = query.strip("/\\").replace("/", os.sep)
+        scored = []
+        for i in candidates:
+            score = fuzzy_score(query, self.paths[i])
+            if score is not None:
+                scored.append((score, -i))
+        return [self.paths[-i] for _, i in heapq.nlargest(limit, scored)]
@@ -45,11 +45,16 @@ class MenuItems(QWidget):
         open_folder_action.setShortcut("Ctrl+K")
         open_folder_action.triggered.connect(self.main_window.open_folder)
 
+        go_to_file = QAction("Go to File", self)
+        go_to_file.setShortcut("Ctrl+P")
+        go_to_file.triggered.connect(self.main_window.go_to_file)
+
         # Add the menu item to the menu
         file_menu.addAction(new_file)
         file_menu.addSeparator()
         file_menu.addAction(open_file)
         file_menu.addAction(open_folder_action)
+        file_menu.addAction(go_to_file)
         file_menu.addSeparator()
         file_menu.addAction(save_file)
         file_menu.addAction(save_as)
@@ -63,6 +68,30 @@ class MenuItems(QWidget):
 
         edit_menu.addAction(copy_action)
 
+        # View menu
+        view_menu = menu_bar.addMenu("View")
+        split_editor = QAction("Split Editor", self)
+        split_editor.setShortcut("Ctrl+\\")
+        split_editor.triggered.connect(self.main_window.split_editor)
+
+        view_menu.addAction(split_editor)
+
+        # Tools menu
+        tools_menu = menu_bar.addMenu("Tools")
+        self.record_metrics = QAction("Record Metrics", self)
+        self.record_metrics.setCheckable(True)
+        self.record_metrics.toggled.connect(self.main_window.set_metrics_enabled)
+
+        export_metrics = QAction("Export Metrics...", self)
+        export_metrics.triggered.connect(self.main_window.export_metrics)
+
+        reset_metrics = QAction("Reset Metrics", self)
+        reset_metrics.triggered.connect(self.main_window.reset_metrics)
+
+        tools_menu.addAction(self.record_metrics)
+        tools_menu.addAction(export_metrics)
+        tools_menu.addAction(reset_metrics)
+
         menu_bar.setMinimumHeight(40)
         self.lay.addWidget(menu_bar)
 
@@ -82,8 +111,8 @@ class Heading(QFrame):
         self.title_lbl.setPixmap(logo)
         # main_layout.addWidget(self.title_lbl, alignment=Qt.AlignmentFlag.AlignLeft) 
 
-        menu = MenuItems(self.main_window)
-        main_layout.addWidget(menu, alignment=Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignCenter) 
+        self.menu = MenuItems(self.main_window)
+        main_layout.addWidget(self.menu, alignment=Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignCenter) 
 
         self.path_lbl = QLabel("")
         self.path_lbl.setStyleSheet(f"font-size: 14px; font-weight: bold; color: white; margin-right: 10px; border: none;") 
@@ -0,0 +1,365 @@
+from pathlib import Path
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+
+CACHE_DIR = Path.home() / ".neutron" / "ignore-cache"
+USER_IGNORE = Path.home() / ".neutron" / "ignore" # gitignore syntax, applies to every folder
+IGNORE_FILES = (".gitignore", ".ignore") # read in every folder, .ignore wins over .gitignore
+_save_lock = threading.Lock() # the cache files of every engine
+
+# always applied, below every ignore file
+DEFAULT_IGNORES = [
+    ".git/", ".svn/", ".hg/", ".bzr/", ".idea/", "__pycache__/", "venv/",
+    "*.svg", "*.png", "*.exe", "*.pyc", "*.qm",
+]
+
+FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+
+def translate(glob: str) -> str:
+    """Regex for a gitignore glob, * and ? don't match / and ** matches any number of folders"""
+    out = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob.startswith("**", i) and (i == 0 or glob[i - 1] == "/"):
+                if i + 2 == n:
+                    # trailing /**, everything inside
+                    out.append(".*")
+                    i += 2
+                    continue
+                if glob[i + 2] == "/":
+                    # **/ zero or more folders
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+            while i + 1 < n and glob[i + 1] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and glob[j] in "!^":
+                j += 1
+            if j < n and glob[j] == "]":
+                j += 1
+            j = glob.find("]", j)
+            if j == -1:
+                out.append("\\[")
+            else:
+                body = glob[i + 1:j]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append("[" + body + "]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_rule(line: str) -> tuple[str, bool, bool]:
+    """(regex, negated, folders only) for a line of an ignore file, None for blanks and comments"""
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        # an escaped trailing space is kept
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # a / anywhere but the end ties the glob to the ignore file's folder
+    anchored = "/" in line
+    regex = translate(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negated, dir_only
+
+
+class IgnoreRules:
+    """The rules of one ignore file, paths are matched relative to the folder it's in"""
+
+    def __init__(self, base: str, lines):
+        self.base = base # folder of the file relative to the root, "" for the root
+        self.rules = [
+            (re.compile(regex, FLAGS), negated, dir_only)
+            for regex, negated, dir_only in filter(None, map(parse_rule, lines))
+        ]
+        # without ! rules the last match doesn't matter, one regex can check them all
+        self.files = self.dirs = None
+        if not any(negated for _, negated, _ in self.rules):
+            self.files = self.combine([r for r, _, dir_only in self.rules if not dir_only])
+            self.dirs = self.combine([r for r, _, _ in self.rules])
+
+    @staticmethod
+    def combine(rules: list[re.Pattern]) -> re.Pattern:
+        if not rules:
+            return None
+        return re.compile("|".join(f"(?:{r.pattern})" for r in rules), FLAGS)
+
+    def match(self, rel: str, is_dir: bool) -> bool:
+        """True when rel is ignored, False when a ! rule brings it back and None if no rule matches"""
+        if self.base:
+            if not rel.startswith(self.base + "/"):
+                return None
+            rel = rel[len(self.base) + 1:]
+
+        if self.dirs is not None or self.files is not None:
+            combined = self.dirs if is_dir else self.files
+            return True if combined is not None and combined.fullmatch(rel) else None
+
+        for regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel):
+                return not negated
+        return None
+
+
+def _digest(*parts) -> str:
+    # hash() of strings changes between runs, the signatures are saved
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+class IgnoreEngine:
+    """Decides what's walked under root.
+
+    Every folder's .gitignore and .ignore are read on the way down, on top
+    of .git/info/exclude, the user's ~/.neutron/ignore and DEFAULT_IGNORES.
+    Deeper files win like they do in git, and ignored folders are pruned
+    before anything in them is listed. Folders named in keep, and
+    everything in them, are only checked against the defaults.
+
+    The listing each folder comes down to is cached along with the folder's
+    mtime and a signature of the ignore files that apply to it, and saved
+    between runs. Walking a tree that hasn't changed only stats the folders.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root, globs: list[str] = DEFAULT_IGNORES, keep=(), cache_dir: Path = CACHE_DIR):
+        self.root = str(Path(root).resolve())
+        self.globs = list(globs)
+        self.keep = set(keep)
+        key = _digest(self.root, self.globs, sorted(self.keep))
+        self.path = Path(cache_dir) / (key + ".pickle")
+
+        # folder -> (mtime, signature, ignore files in it, dirs, symlinked dirs, files)
+        self.cache: dict[str, tuple] = {}
+        self.rules: dict[str, tuple[int, IgnoreRules]] = {} # ignore file -> (mtime, rules)
+        self.default_rules = IgnoreRules("", self.globs)
+        self.loaded = False
+        self.changed = False
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as err:
+            print("Ignore Cache Error:", err)
+            return
+        if data.get("version") == self.VERSION and data.get("root") == self.root:
+            self.cache = data["cache"]
+
+    def save(self):
+        if not self.changed:
+            return
+        data = {"version": self.VERSION, "root": self.root, "cache": self.cache}
+        # the walker, the search worker and the gui thread each have an engine for the same
+        # root, every save goes through its own temp file so they can't write into each other's
+        with _save_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(prefix=self.path.stem + ".", suffix=".tmp", dir=self.path.parent)
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp, self.path)
+                except BaseException:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+                    raise
+                self.changed = False
+            except OSError as err:
+                print("Ignore Cache Error:", err)
+
+    @staticmethod
+    def mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def full_path(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def is_kept(self, rel: str) -> bool:
+        return bool(self.keep) and any(part in self.keep for part in rel.split("/"))
+
+    def base_files(self) -> list[tuple[str, str]]:
+        """(path, base) of the ignore files that sit below every folder's own"""
+        return [(str(USER_IGNORE), ""), (os.path.join(self.root, ".git", "info", "exclude"), "")]
+
+    def ignore_files(self, rel: str) -> tuple[str, ...]:
+        cached = self.cache.get(rel)
+        if cached is not None:
+            return cached[2]
+        folder = self.full_path(rel)
+        return tuple(name for name in IGNORE_FILES if os.path.isfile(os.path.join(folder, name)))
+
+    def signature(self, rel: str) -> str:
+        """Signature of the ignore files that apply to the things in folder rel"""
+        sig = _digest(*(self.mtime(path) for path, _ in self.base_files()))
+        parts = rel.split("/") if rel else []
+        for i in range(len(parts) + 1):
+            folder = "/".join(parts[:i])
+            if self.is_kept(folder):
+                return _digest(sig, "kept")
+            names = self.ignore_files(folder)
+            sig = _digest(sig, names, [self.mtime(os.path.join(self.full_path(folder), n)) for n in names])
+        return sig
+
+    def load_rules(self, path: str, base: str) -> IgnoreRules:
+        mtime = self.mtime(path)
+        cached = self.rules.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                rules = IgnoreRules(base, f.readlines())
+        except OSError:
+            rules = IgnoreRules(base, [])
+        self.rules[path] = (mtime, rules)
+        return rules
+
+    def rules_for(self, rel: str) -> list[IgnoreRules]:
+        """Rules that apply to the things in folder rel, lowest precedence first"""
+        rules = [self.default_rules]
+        if self.is_kept(rel):
+            return rules
+        rules += [self.load_rules(path, base) for path, base in self.base_files() if os.path.isfile(path)]
+        parts = rel.split("/") if rel else []
+        for i in range(len(parts) + 1):
+            folder = "/".join(parts[:i])
+            for name in self.ignore_files(folder):
+                rules.append(self.load_rules(os.path.join(self.full_path(folder), name), folder))
+        return rules
+
+    @staticmethod
+    def decide(rules: list[IgnoreRules], rel: str, is_dir: bool) -> bool:
+        for r in reversed(rules):
+            ignored = r.match(rel, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
+
+    def listing(self, rel: str, parent_sig: str = None) -> tuple:
+        """(signature, dirs, symlinked dirs, files) left in folder rel, None if it can't be read"""
+        path = self.full_path(rel)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self.cache.get(rel)
+        if cached is not None and cached[0] != mtime:
+            # entries changed, an ignore file may have been added or removed
+            cached = None
+            self.cache.pop(rel)
+
+        if parent_sig is None:
+            sig = self.signature(rel)
+        elif self.is_kept(rel):
+            sig = _digest(parent_sig, "kept")
+        else:
+            names = self.ignore_files(rel)
+            sig = _digest(parent_sig, names, [self.mtime(os.path.join(path, n)) for n in names])
+
+        if cached is not None and cached[1] == sig:
+            return sig, cached[3], cached[4], cached[5]
+
+        rules = self.rules_for(rel)
+        dirs, links, files = [], [], []
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return None
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            child = rel + "/" + entry.name if rel else entry.name
+            kept = is_dir and entry.name in self.keep
+            if not kept and self.decide(rules, child, is_dir):
+                continue
+            if is_dir:
+                dirs.append(entry.name)
+                if entry.is_symlink():
+                    links.append(entry.name)
+            else:
+                files.append(entry.name)
+
+        names = tuple(name for name in IGNORE_FILES if name in files)
+        self.cache[rel] = (mtime, sig, names, dirs, links, files)
+        self.changed = True
+        return sig, dirs, links, files
+
+    def list_folder(self, rel: str) -> tuple[list[str], list[str]]:
+        """dirs and files left in folder rel, relative to root with / between the parts"""
+        listing = self.listing(rel)
+        if listing is None:
+            return [], []
+        return list(listing[1]), list(listing[3])
+
+    def walk(self, folder: str = ""):
+        """os.walk over root/folder without what's ignored, the dirs given can be pruned further"""
+        self.load()
+        visited = set()
+        stack = [(folder, None)]
+        while stack:
+            rel, parent_sig = stack.pop()
+            listing = self.listing(rel, parent_sig)
+            if listing is None:
+                continue
+            visited.add(rel)
+            sig, dirs, links, files = listing
+            dirs = list(dirs)
+            yield self.full_path(rel), dirs, list(files)
+            # like os.walk, symlinked folders are listed but not walked into
+            for d in reversed(dirs):
+                if d not in links:
+                    stack.append((rel + "/" + d if rel else d, sig))
+
+        if not folder:
+            # folders that weren't reached are gone or ignored now
+            for rel in [rel for rel in self.cache if rel not in visited]:
+                del self.cache[rel]
+                self.changed = True
+        self.save()
@@ -3,11 +3,22 @@ import keyword
 import builtins
 import types
 import json
+import os
+import time
 
 from PyQt5.QtGui import QFont, QColor
-from PyQt5.Qsci import QsciLexerCustom
+from PyQt5.Qsci import QsciLexerCustom, QsciScintilla
 from typing import TYPE_CHECKING
 
+from file_types import FileType
+from metrics import metrics
+
+try:
+    from tree_sitter import Language, Parser
+except ImportError:
+    # tree sitter is optional, the regex lexers are used without it
+    Language = Parser = None
+
 
 if TYPE_CHECKING:
     from editor import Editor
@@ -25,9 +36,132 @@ if TYPE_CHECKING:
 # config type
 DefaultConfig = dict[str, str, tuple[str, int]]
 
+# tokens are matched on the utf-8 encoded text, bytes above 0x7f
+# are part of a word so multi byte characters are never split
+TOKEN_PATTERN = re.compile(rb"[*]\/|\/[*]|\s+|(?:\w|[\x80-\xff])+|\W")
+
+# languages compiled into the bundled tree sitter library
+TREE_SITTER_LIBRARY = "./neutron-tree-sitters/neutron-tree-sitters.so"
+TREE_SITTER_LANGUAGES = {
+    FileType.Python: ("Python", "python"),
+    FileType.Json: ("JSON", "json"),
+}
+_loaded_languages = {}
+
+
+def get_tree_sitter_language(name: str):
+    """Load `name` from the bundled tree sitter library once, None if it can't be loaded"""
+    if Language is None:
+        return None
+    if name not in _loaded_languages:
+        try:
+            _loaded_languages[name] = Language(TREE_SITTER_LIBRARY, name)
+        except (OSError, AttributeError) as e:
+            print(f"Tree sitter error: {e}")
+            _loaded_languages[name] = None
+    return _loaded_languages[name]
+
+
+# names of the python builtin functions, the same for every lexer
+PYTHON_BUILTINS = [
+    name
+    for name, obj in vars(builtins).items()
+    if isinstance(obj, types.BuiltinFunctionType)
+]
+
+
+class ThemeRegistry:
+    """Theme files parsed once and shared by every lexer.
+
+    The styles of a theme are turned into QColor and QFont objects the
+    first time it's asked for, the file is only read again after its mtime
+    changes.
+    """
+
+    STYLE_NAMES = [
+        "default",
+        "keyword",
+        "classes",
+        "functions",
+        "function_def",
+        "string",
+        "types",
+        "keyargs",
+        "brackets",
+        "comments",
+        "constants",
+    ]
+
+    FONT_WEIGHTS = {
+        'thin': QFont.Thin,
+        'extralight': QFont.ExtraLight,
+        'light': QFont.Light,
+        'normal': QFont.Normal,
+        'medium': QFont.Medium,
+        'demibold': QFont.DemiBold,
+        'bold': QFont.Bold,
+        'extrabold': QFont.ExtraBold,
+        'black': QFont.Black,
+    }
+
+    def __init__(self):
+        # path -> (mtime, theme json, [(style name, color, paper, font)])
+        self.themes: dict[str, tuple[int, dict, list]] = {}
+
+    def get(self, path: str) -> tuple[dict, list[tuple[str, QColor, QColor, QFont]]]:
+        """The json of the theme at path and its styles, a None color, paper or font isn't set"""
+        path = os.path.abspath(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = self.themes.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        with open(path, "r") as f:
+            theme_json = json.load(f)
+        styles = self.resolve(theme_json)
+        self.themes[path] = (mtime, theme_json, styles)
+        return theme_json, styles
+
+    def resolve(self, theme_json: dict) -> list[tuple[str, QColor, QColor, QFont]]:
+        styles = []
+        for clr in theme_json["theme"]["syntax"]:
+            name: str = list(clr.keys())[0]
+            if name not in self.STYLE_NAMES:
+                print("Theme error: {} is not a valid style name".format(name))
+                continue
+
+            color = paper = font = None
+            for k, v in clr[name].items():
+                if k == 'color':
+                    color = QColor(v)
+                elif k == 'paper':
+                    paper = QColor(v)
+                elif k == 'font':
+                    try:
+                        font = QFont(
+                            v.get('family', 'Consolas'),
+                            v.get('font-size', 14),
+                            self.FONT_WEIGHTS.get(v.get('font-weight', 'normal'), QFont.Normal),
+                            v.get('italic', False),
+                        )
+                    except AttributeError as e:
+                        print(f"Theme error: {e}")
+            styles.append((name, color, paper, font))
+        return styles
+
+
+themes = ThemeRegistry()
+
 class NeutronLexer(QsciLexerCustom):
     """Base Custom Lexer class for all language"""
 
+    # line state of a line that ends outside of any string or comment,
+    # line states are stored in scintilla with SCI_SETLINESTATE
+    CLEAN = 0
+
     def __init__(self, language_name, editor, theme=None, defaults: DefaultConfig = None):
         super(NeutronLexer, self).__init__(editor)
 
@@ -41,6 +175,7 @@ class NeutronLexer(QsciLexerCustom):
             self.theme = theme
 
         self.token_list: list[str, int] = []
+        self.token_pos = 0
         
         self.keywords_list = []
         self.builtin_names = []
@@ -61,6 +196,11 @@ class NeutronLexer(QsciLexerCustom):
         self._init_theme_vars()
         self._init_theme()
 
+        # incremental styling, positions are in bytes
+        self._dirty_end = -1 # everything after this is unchanged since last styling
+        self._styled_end = 0 # everything before this was styled with a valid state chain
+        self.editor.SCN_MODIFIED.connect(self._on_modified)
+
     def setKeywords(self, keywords: list[str]):
         '''Set list of strings that considered keywords for this language'''
         self.keywords_list = keywords
@@ -70,36 +210,16 @@ class NeutronLexer(QsciLexerCustom):
         self.builtin_names = builtin_names
 
     def _init_theme(self):
-        with open(self.theme, "r") as f:
-            self.theme_json = json.load(f)
-        
-        colors = self.theme_json["theme"]["syntax"]
-        for clr in colors:
-            name: str = list(clr.keys())[0]
-            if name not in self.default_names:
-                print("Theme error: {} is not a valid style name".format(name))
-                continue
-
-            for k, v in clr[name].items():
-                if k == 'color':
-                    self.setColor(QColor(v), getattr(self, name.upper()))
-                elif k == 'paper':
-                    self.setPaper(QColor(v), getattr(self, name.upper()))
-                elif k == 'font':
-                    try:
-                        font = QFont(
-                            v.get('family', 'Consolas'),
-                            v.get('font-size', 14),
-                            self.font_weights.get(v.get('font-weight', QFont.Normal)),
-                            v.get('italic', False),
-                        )
-                        self.setFont(
-                            font,
-                                getattr(self, name.upper()
-                            )
-                        )
-                    except AttributeError as e:
-                        print(f"Theme error: {e}")
+        # parsed once and shared with the other lexers
+        self.theme_json, styles = themes.get(self.theme)
+        for name, color, paper, font in styles:
+            style = getattr(self, name.upper())
+            if color is not None:
+                self.setColor(color, style)
+            if paper is not None:
+                self.setPaper(paper, style)
+            if font is not None:
+                self.setFont(font, style)
 
     def _init_theme_vars(self):
         # Initialize colors per style
@@ -117,32 +237,6 @@ class NeutronLexer(QsciLexerCustom):
         self.CLASSES = 9
         self.FUNCTION_DEF = 10
 
-        self.default_names = [
-            "default",
-            "keyword",
-            "classes",
-            "functions",
-            "function_def",
-            "string",
-            "types",
-            "keyargs",
-            "brackets",
-            "comments",
-            "constants",
-        ]
-
-        self.font_weights = {
-            'thin': QFont.Thin,
-            'extralight': QFont.ExtraLight,
-            'light': QFont.Light,
-            'normal': QFont.Normal,
-            'medium': QFont.Medium,
-            'demibold': QFont.DemiBold,
-            'bold': QFont.Bold,
-            'extrabold': QFont.ExtraBold,
-            'black': QFont.Black,
-        }
-
     def language(self):
         return self.language_name
 
@@ -173,76 +267,171 @@ class NeutronLexer(QsciLexerCustom):
         ###
         return ""
 
-    def generate_tokens(self, text):
+    def _on_modified(self, position, mod_type, text, length, *args):
+        """Keep track of the edited region so styling can stop right after it"""
+        if mod_type & QsciScintilla.SC_MOD_INSERTTEXT:
+            if self._dirty_end > position:
+                self._dirty_end += length
+            if self._styled_end > position:
+                self._styled_end += length
+            self._dirty_end = max(self._dirty_end, position + length)
+        elif mod_type & QsciScintilla.SC_MOD_DELETETEXT:
+            if self._dirty_end > position:
+                self._dirty_end = max(position, self._dirty_end - length)
+            if self._styled_end > position:
+                self._styled_end = max(position, self._styled_end - length)
+            self._dirty_end = max(self._dirty_end, position)
+
+    def get_text_range(self, start: int, end: int) -> bytes:
+        """Get the raw bytes between start and end without copying the whole document"""
+        # QsciScintilla.bytes uses SCI_GETTEXTRANGE and adds a trailing null byte
+        return bytes(self.editor.bytes(start, end))[:end - start]
+
+    def get_line_state(self, line: int) -> int:
+        return self.editor.SendScintilla(QsciScintilla.SCI_GETLINESTATE, line)
+
+    def set_line_state(self, line: int, state: int):
+        self.editor.SendScintilla(QsciScintilla.SCI_SETLINESTATE, line, state)
+
+    def styleText(self, start: int, end: int):
+        """Restyle the range line by line.
+
+        Styling resumes from the state stored on the line before `start` and
+        stops as soon as a line past the edited region ends in the same state
+        it had before, since everything after it is still styled correctly.
+        """
+        timed = metrics.enabled
+        if timed:
+            began = time.perf_counter()
+        editor = self.editor
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        start = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        # always style whole lines so the stored state is the state at the line end
+        end_line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, max(end - 1, start))
+        end = max(end, editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, end_line + 1))
+        end = min(end, editor.SendScintilla(QsciScintilla.SCI_GETLENGTH))
+
+        state = self.get_line_state(line - 1) if line > 0 else self.CLEAN
+
+        self.startStyling(start)
+        pos = start
+        restyled_end = None
+        for line_text in self.get_text_range(start, end).splitlines(keepends=True):
+            line_start = pos
+            state = self.style_line(line_text, state)
+            pos += len(line_text)
+
+            previous_state = self.get_line_state(line)
+            if state != previous_state:
+                self.set_line_state(line, state)
+            line += 1
+
+            # the stored state can only be trusted for lines that start after the edit,
+            # scintilla copies line states around when lines are inserted or removed
+            if state == previous_state and line_start > self._dirty_end and end <= self._styled_end:
+                # nothing changed after this line, skip to the end of the styled region
+                restyled_end = pos
+                if pos < self._styled_end:
+                    self.startStyling(self._styled_end)
+                pos = self._styled_end
+                break
+
+        self._styled_end = pos
+        if pos >= self._dirty_end:
+            self._dirty_end = -1
+
+        if timed:
+            metrics.record("lexer.style", time.perf_counter() - began)
+            metrics.count("lexer.bytes", (pos if restyled_end is None else restyled_end) - start)
+
+    def style_line(self, text: bytes, state: int) -> int:
+        """Style a single line starting in `state` and return the state at its end,
+        lexers that don't override it leave the line in the default style"""
+        self.setStyling(len(text), self.DEFAULT)
+        return self.CLEAN
+
+    def generate_tokens(self, text: bytes):
         # 3. Tokenize the text
         # ---------------------
-        p = re.compile(r"[*]\/|\/[*]|\s+|\w+|\W")
-
         # 'token_list' is a list of tuples: (token_name, token_len), ex: '(class, 5)'
-        self.token_list = [(token, len(bytearray(token, "utf-8"))) for token in p.findall(text)]
+        # token_len is in bytes and comes straight from the match offsets
+        self.token_list = [
+            (m.group().decode("utf-8", errors="surrogateescape"), m.end() - m.start())
+            for m in TOKEN_PATTERN.finditer(text)
+        ]
+        # index of the next token, tokens are never removed from the list
+        self.token_pos = 0
 
     def next_tok(self, skip: int = None):
-        if len(self.token_list) > 0:
-            if skip is not None and skip != 0:
-                for _ in range(skip - 1):
-                    if len(self.token_list) > 0:
-                        self.token_list.pop(0)
-            return self.token_list.pop(0)
+        """Consume the next token, with `skip` the `skip - 1` tokens before it are consumed too"""
+        if skip:
+            self.token_pos += skip - 1
+        if self.token_pos < len(self.token_list):
+            self.token_pos += 1
+            return self.token_list[self.token_pos - 1]
         else:
+            self.token_pos = len(self.token_list)
             return None
 
     def peek_tok(self, n=0):
-        try:
-            return self.token_list[n]
-        except IndexError:
-            return [""]
+        if self.token_pos + n < len(self.token_list):
+            return self.token_list[self.token_pos + n]
+        return [""]
 
     def skip_spaces_peek(self, skip=None):
         """find the next non-space token but using peek without consuming it"""
         i = 0
-        tok = " "
         if skip is not None:
             i = skip
-        while tok[0].isspace():
-            tok = self.peek_tok(i)
+        tok = self.peek_tok(i)
+        # a run of whitespace is always a single token
+        if tok[0].isspace():
             i += 1
-        return tok, i
+            tok = self.peek_tok(i)
+        return tok, i + 1
 
 
 class PyCustomLexer(NeutronLexer):
     """Custom lexer for python"""
+
+    # line states
+    SINGLE_QUOTE_STRING = 1
+    DOUBLE_QUOTE_STRING = 2
+    TRIPLE_SINGLE_QUOTE_STRING = 3
+    TRIPLE_DOUBLE_QUOTE_STRING = 4
+    COMMENT = 5
+
     def __init__(self, editor):
         super(PyCustomLexer, self).__init__("Python", editor)
 
         self.setKeywords(keyword.kwlist)
-        self.setBuiltinNames([
-            name
-            for name, obj in vars(builtins).items()
-            if isinstance(obj, types.BuiltinFunctionType)
-        ])
+        self.setBuiltinNames(PYTHON_BUILTINS)
+
+        # string state -> quote that closes it
+        self.string_quotes = {
+            self.SINGLE_QUOTE_STRING: "'",
+            self.DOUBLE_QUOTE_STRING: '"',
+            self.TRIPLE_SINGLE_QUOTE_STRING: "'''",
+            self.TRIPLE_DOUBLE_QUOTE_STRING: '"""',
+        }
 
-    def styleText(self, start, end):
-        # 1. Initialize the styling procedure
-        # ------------------------------------
-        self.startStyling(start)
+    def is_triple_quote(self, tok: str) -> bool:
+        """check if `tok` and the next two tokens make a triple quote"""
+        return self.peek_tok()[0] == tok and self.peek_tok(1)[0] == tok
 
-        # 2. Slice out a part from the text
-        # ----------------------------------
-        text = self.editor.text()[start:end]
-        # 3. Tokenize the text
+    def style_name(self, skip: int, style: int):
+        """style the spaces before the name `skip` tokens ahead and then the name itself"""
+        for _ in range(skip - 1):
+            space = self.next_tok()
+            self.setStyling(space[1], self.DEFAULT)
+        name = self.next_tok()
+        self.setStyling(name[1], style)
+
+    def style_line(self, text: bytes, state: int) -> int:
+        # Tokenize the line
         # ---------------------
         self.generate_tokens(text)
 
-        # Flags
-        string_flag = False
-        comment_flag = False
-
-        # UPDATED EP 9
-        if start > 0:
-            previous_style_nr = self.editor.SendScintilla(self.editor.SCI_GETSTYLEAT, start - 1)
-            if previous_style_nr == self.COMMENTS:
-                comment_flag = False
-
         while True:
             curr_token = self.next_tok()
             if curr_token is None:
@@ -251,40 +440,42 @@ class PyCustomLexer(NeutronLexer):
             tok: str = curr_token[0]
             tok_len: int = curr_token[1]
 
-            # UPDATED EP 9
-            if comment_flag:
+            if state == self.COMMENT:
                 self.setStyling(tok_len, self.COMMENTS)
-                if tok.endswith("\n") or tok.startswith('\n'):
-                    comment_flag = False
+                if "\n" in tok:
+                    state = self.CLEAN
                 continue
 
-            if string_flag:
-                self.setStyling(curr_token[1], self.STRING)
-                if tok == '"' or tok == "'":
-                    string_flag = False
+            if state in self.string_quotes:
+                quote = self.string_quotes[state]
+                self.setStyling(tok_len, self.STRING)
+                if tok == "\\":
+                    # escaped character, or a line continuation
+                    escaped = self.next_tok()
+                    if escaped is not None:
+                        self.setStyling(escaped[1], self.STRING)
+                elif tok == quote[0] and (len(quote) == 1 or self.is_triple_quote(tok)):
+                    if len(quote) == 3:
+                        self.setStyling(self.next_tok()[1] + self.next_tok()[1], self.STRING)
+                    state = self.CLEAN
+                elif len(quote) == 1 and "\n" in tok:
+                    # unterminated string, don't let it bleed into the next line
+                    state = self.CLEAN
                 continue
 
             if tok == "class":
                 name, ni = self.skip_spaces_peek()
                 brac_or_colon, _ = self.skip_spaces_peek(ni)
+                self.setStyling(tok_len, self.KEYWORD)
                 if name[0].isidentifier() and brac_or_colon[0] in (":", "("):
-                    self.setStyling(tok_len, self.KEYWORD)
-                    _ = self.next_tok(ni)  # skin to the name token
-                    self.setStyling(name[1] + 1, self.CLASSES)
-                    continue
-                else:
-                    self.setStyling(tok_len, self.KEYWORD)
-                    continue
+                    self.style_name(ni, self.CLASSES)
+                continue
             elif tok == "def":
                 name, ni = self.skip_spaces_peek()
+                self.setStyling(tok_len, self.KEYWORD)
                 if name[0].isidentifier():
-                    self.setStyling(tok_len, self.KEYWORD)
-                    _ = self.next_tok(ni)
-                    self.setStyling(name[1] + 1, self.FUNCTION_DEF)
-                    continue
-                else:
-                    self.setStyling(tok_len, self.KEYWORD)
-                    continue
+                    self.style_name(ni, self.FUNCTION_DEF)
+                continue
             elif tok in self.keywords_list:
                 self.setStyling(tok_len, self.KEYWORD)
                 continue
@@ -305,13 +496,16 @@ class PyCustomLexer(NeutronLexer):
                 self.setStyling(tok_len, self.BRACKETS)
                 continue
             elif tok == '"' or tok == "'":
+                if self.is_triple_quote(tok):
+                    tok_len += self.next_tok()[1] + self.next_tok()[1]
+                    state = self.TRIPLE_DOUBLE_QUOTE_STRING if tok == '"' else self.TRIPLE_SINGLE_QUOTE_STRING
+                else:
+                    state = self.DOUBLE_QUOTE_STRING if tok == '"' else self.SINGLE_QUOTE_STRING
                 self.setStyling(tok_len, self.STRING)
-                string_flag = True
                 continue
             elif tok == "#":
-                # UPDATED EP 9
                 self.setStyling(tok_len, self.COMMENTS)
-                comment_flag = True
+                state = self.COMMENT
             elif tok in self.builtin_names or tok in [
                 "+",
                 "-",
@@ -327,6 +521,8 @@ class PyCustomLexer(NeutronLexer):
             else:
                 self.setStyling(tok_len, self.DEFAULT)
 
+        return state
+
 
 class JsonLexer(NeutronLexer):
     """Custom lexer for JSON"""
@@ -338,15 +534,8 @@ class JsonLexer(NeutronLexer):
             "false"
         ])
 
-    def styleText(self, start, end):
-        # 1. Initialize the styling procedure
-        # ------------------------------------
-        self.startStyling(start)
-
-        # 2. Slice out a part from the text
-        # ----------------------------------
-        text = self.editor.text()[start:end]
-        # 3. Tokenize the text
+    def style_line(self, text: bytes, state: int) -> int:
+        # Tokenize the line
         # ---------------------
         self.generate_tokens(text)
 
@@ -380,4 +569,224 @@ class JsonLexer(NeutronLexer):
                 self.setStyling(tok_len, self.TYPES)
                 continue
             else:
-                self.setStyling(tok_len, self.DEFAULT)
\ No newline at end of file
+                self.setStyling(tok_len, self.DEFAULT)
+
+        # json strings never span lines
+        return self.CLEAN
+
+
+class TreeSitterLexer(NeutronLexer):
+    """Lexer that styles from a tree sitter parse tree.
+
+    The tree is edited along with the document and reparsed incrementally,
+    only the ranges tree sitter reports as changed are restyled.
+    """
+
+    # chunk size used when tree sitter reads the document
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, editor, language_name: str, language):
+        super(TreeSitterLexer, self).__init__(language_name, editor)
+
+        self.parser = Parser()
+        self.parser.set_language(language)
+        self.tree = None
+        self._edit_start = None # first byte edited since the last parse
+        self._old_end_point = None # set before a deletion
+        self._length = 0
+
+        if language_name == "Python":
+            self.setKeywords(keyword.kwlist)
+            self.setBuiltinNames(PYTHON_BUILTINS)
+            # nodes that are styled as a whole without looking at their children
+            self.node_styles = {
+                "string": self.STRING,
+                "comment": self.COMMENTS,
+                "integer": self.CONSTANTS,
+                "float": self.CONSTANTS,
+                "true": self.KEYWORD,
+                "false": self.KEYWORD,
+                "none": self.KEYWORD,
+            }
+        else:
+            self.node_styles = {
+                "string": self.STRING,
+                "comment": self.COMMENTS,
+                "number": self.CONSTANTS,
+                "true": self.TYPES,
+                "false": self.TYPES,
+                "null": self.TYPES,
+            }
+
+    @classmethod
+    def for_file_type(cls, editor, file_type: FileType):
+        """Create a tree sitter lexer for `file_type`, None if there is no grammar for it"""
+        if file_type not in TREE_SITTER_LANGUAGES:
+            return None
+        language_name, name = TREE_SITTER_LANGUAGES[file_type]
+        language = get_tree_sitter_language(name)
+        if language is None:
+            return None
+        return cls(editor, language_name, language)
+
+    def point(self, position: int) -> tuple[int, int]:
+        line = self.editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        return line, position - self.editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+
+    def _on_modified(self, position, mod_type, text, length, *args):
+        """Apply every edit to the tree so the next parse can reuse it"""
+        super(TreeSitterLexer, self)._on_modified(position, mod_type, text, length, *args)
+        if self.tree is None:
+            return
+
+        if mod_type & QsciScintilla.SC_MOD_BEFOREDELETE:
+            self._old_end_point = self.point(position + length)
+        elif mod_type & QsciScintilla.SC_MOD_INSERTTEXT:
+            start_point = self.point(position)
+            self.tree.edit(
+                position, position, position + length,
+                start_point, start_point, self.point(position + length),
+            )
+        elif mod_type & QsciScintilla.SC_MOD_DELETETEXT:
+            start_point = self.point(position)
+            self.tree.edit(
+                position, position + length, position,
+                start_point, self._old_end_point or start_point, start_point,
+            )
+        else:
+            return
+
+        if self._edit_start is None or position < self._edit_start:
+            self._edit_start = position
+
+    def _read(self, byte_offset: int, point) -> bytes:
+        if byte_offset >= self._length:
+            return b""
+        return self.get_text_range(byte_offset, min(byte_offset + self.READ_SIZE, self._length))
+
+    def styleText(self, start: int, end: int):
+        timed = metrics.enabled
+        if timed:
+            began = time.perf_counter()
+        self._length = self.editor.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+        end = min(end, self._length)
+
+        if self.tree is None:
+            self.tree = self.parser.parse(self._read, keep_text=False)
+            regions = [(start, end)]
+            styled_end = end
+        else:
+            regions = []
+            if self._edit_start is not None:
+                old_tree = self.tree
+                self.tree = self.parser.parse(self._read, old_tree, keep_text=False)
+                regions = [(r.start_byte, r.end_byte) for r in old_tree.changed_ranges(self.tree)]
+                # the edited lines themselves, the structure might be the same but
+                # styles like self or builtin names depend on the text
+                edit_line = self.editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, self._edit_start)
+                dirty_line = self.editor.SendScintilla(
+                    QsciScintilla.SCI_LINEFROMPOSITION, max(self._dirty_end, self._edit_start)
+                )
+                regions.append((
+                    self.editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, edit_line),
+                    self.editor.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, dirty_line),
+                ))
+                # whatever is after the styled region has never been styled
+                regions = [(a, min(b, self._styled_end)) for a, b in regions]
+            if end > self._styled_end:
+                regions.append((max(start, self._styled_end), end))
+            styled_end = max(end, self._styled_end)
+
+        pos = 0
+        restyled = 0
+        for region_start, region_end in sorted(regions):
+            region_start = max(region_start, pos)
+            region_end = min(region_end, self._length)
+            if region_start < region_end:
+                self.style_region(region_start, region_end)
+                restyled += region_end - region_start
+                pos = region_end
+
+        # mark everything up to here as styled, nothing else changed
+        self.startStyling(min(styled_end, self._length))
+        self._styled_end = min(styled_end, self._length)
+        self._dirty_end = -1
+        self._edit_start = None
+
+        if timed:
+            metrics.record("lexer.style", time.perf_counter() - began)
+            metrics.count("lexer.bytes", restyled)
+
+    def style_region(self, start: int, end: int):
+        text = self.get_text_range(start, end)
+        self.startStyling(start)
+        pos = start
+        for node_start, node_end, style in self.iter_highlights(start, end, text):
+            node_start = max(node_start, pos)
+            node_end = min(node_end, end)
+            if node_start > pos:
+                self.setStyling(node_start - pos, self.DEFAULT)
+                pos = node_start
+            # missing nodes inserted by error recovery are empty
+            if node_end > node_start:
+                self.setStyling(node_end - node_start, style)
+                pos = node_end
+        if end > pos:
+            self.setStyling(end - pos, self.DEFAULT)
+
+    def iter_highlights(self, start: int, end: int, text: bytes):
+        """Yield (start, end, style) for the nodes of the tree between start and end"""
+        cursor = self.tree.walk()
+        while True:
+            node = cursor.node
+            if node.start_byte >= end:
+                return
+            if node.end_byte > start:
+                style = self.node_styles.get(node.type)
+                if style is None and cursor.goto_first_child():
+                    # go down into the children, the ones before `start` are skipped
+                    continue
+                if style is None:
+                    style = self.leaf_style(cursor, node, start, text)
+                yield node.start_byte, node.end_byte, style
+
+            # move on to the next node after this one
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return
+
+    def leaf_style(self, cursor, node, start: int, text: bytes) -> int:
+        if not node.is_named:
+            if node.type in self.keywords_list:
+                return self.KEYWORD
+            elif node.type in ["(", ")", "{", "}", "[", "]"]:
+                return self.BRACKETS
+            elif node.type in ["+", "-", "*", "/", "%", "=", "<", ">"]:
+                return self.TYPES
+            return self.DEFAULT
+
+        if node.type != "identifier":
+            return self.DEFAULT
+
+        parent = node.parent
+        field = cursor.field_name
+        if field == "name" and parent.type == "function_definition":
+            return self.FUNCTION_DEF
+        elif field == "name" and parent.type == "class_definition":
+            return self.CLASSES
+        elif field == "function" and parent.type == "call":
+            return self.FUNCTIONS
+        elif field == "attribute" and parent.parent is not None and parent.parent.type == "call" \
+                and parent.parent.child_by_field_name("function") == parent:
+            return self.FUNCTIONS
+
+        if start <= node.start_byte and node.end_byte <= start + len(text):
+            name = text[node.start_byte - start:node.end_byte - start]
+        else:
+            name = self.get_text_range(node.start_byte, node.end_byte)
+        name = name.decode("utf-8", errors="surrogateescape")
+        if name == "self":
+            return self.CONSTANTS
+        elif name in self.builtin_names:
+            return self.TYPES
+        return self.DEFAULT
@@ -1,3 +1,6 @@
+import time
+STARTED = time.perf_counter() # for --profile-startup, before the imports
+
 from PyQt5.QtWidgets import (
     QDesktopWidget, QApplication,
     QFrame,
@@ -7,38 +10,111 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QTabWidget,
     QLineEdit, QCheckBox, QLabel,
-    QListWidget,
+    QListView,
     QSpacerItem,
-    QMessageBox, QStatusBar, QFileDialog
+    QMessageBox, QStatusBar, QFileDialog, QProgressBar, QPushButton
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QModelIndex, QTimer
 from PyQt5.QtGui import QFont, QEnterEvent, QMouseEvent
 from PyQt5.Qsci import QsciScintilla
 
-from editor import Editor
+from editor import Editor, SplitView, TabPlaceholder, EditorPool
 from file_manager import FileManager
-from fuzzy_searcher import SearchItem, SearchWorker
+from fuzzy_searcher import SearchResultsModel, SearchWorker, PathIndex
+from quick_open import QuickOpen
+from autocompleter import JediProject
+from completion_server import CompletionServer
 from heading import Heading
+from file_loader import LARGE_FILE_SIZE
+from file_saver import FileSaver
+from documents import DocumentRegistry
+from file_watcher import FileWatcher
+from environments import EnvironmentFinder
+from startup_profile import StartupProfile
+from metrics import metrics
 
 from qframelesswindow import FramelessMainWindow
 import resources
 
 import sys
 import os
+import argparse
 from pathlib import Path
-import jedi
 from PyQt5.QtGui import QIcon
 
 # Main window class
 class MainWindow(FramelessMainWindow):
-    def __init__(self):
+    # background tabs past this many keep their text but drop their lexer and completion,
+    # so do the ones that haven't been looked at for IDLE_SECONDS
+    ACTIVE_EDITORS = 8
+    IDLE_SECONDS = 5 * 60
+
+    def __init__(self, completion_workers=0, search_workers=0, profile: StartupProfile = None, poll_files=False):
         super().__init__()
         self.app_name = "QCodeEditor"
+        self.profile = profile or StartupProfile(time.perf_counter())
 
         self.current_file = None
         self.current_side_bar = None
-        self.envs = list(jedi.find_virtualenvs())
+        self.envs = [] # found in the background after the window is shown
+        # shared by the editors of the opened folder, jedi is loaded by start_completion
+        self.jedi_project = JediProject(os.getcwd())
+        # run jedi in worker processes instead of threads
+        self.completion_workers = completion_workers
+        self.completion_server = None
+        self.search_workers = search_workers
+        # saves are written in the background
+        self.file_saver = FileSaver()
+        self.file_saver.saved.connect(self.file_saved)
+        self.file_saver.failed.connect(self.file_save_failed)
+        self.saving: dict[str, tuple[Editor, int]] = {} # path -> (editor, token of its latest save)
+        # changes made outside the editor, to the open files and the opened folder
+        self.file_watcher = FileWatcher(self, poll=poll_files)
+        self.file_watcher.changed.connect(self.files_changed)
+        self.documents = DocumentRegistry(self.file_watcher) # open files -> their editor
+        self.editor_pool = EditorPool() # closed editors to open files with
         self.init_ui()
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(60 * 1000)
+        self.idle_timer.timeout.connect(self.hibernate_idle)
+        self.idle_timer.start()
+
+        self.env_finder: EnvironmentFinder = None
+        self.profile.begin("environments")
+        self.find_environments(os.getcwd())
+
+    def find_environments(self, root: str):
+        """Look for the folder's virtualenvs in the background, environments_found gets them"""
+        old = self.env_finder
+        if old is not None and old.isRunning():
+            # what it finds is for the previous folder, it's dropped once it's done
+            old.setParent(self)
+            old.finished.connect(old.deleteLater)
+        self.envs = []
+        self.env_finder = EnvironmentFinder(root)
+        self.env_finder.found.connect(self.environments_found)
+        self.env_finder.start()
+
+    def environments_found(self, root: str, envs: list):
+        if root != self.env_finder.root:
+            return
+        self.envs = envs
+        env = envs[0] if len(envs) > 0 else None
+        self.jedi_project.set_environment(env)
+        if self.completion_server is not None:
+            self.completion_server.set_project(self.jedi_project.root, env)
+        self.profile.end("environments")
+
+    def start_completion(self):
+        """Load jedi for the first python file, nothing of it is loaded at startup"""
+        if self.jedi_project.warmed:
+            return
+        if self.completion_workers > 0:
+            self.completion_server = CompletionServer(
+                self.completion_workers, self.jedi_project.root, self.jedi_project.env
+            )
+        self.jedi_project.warm_up()
 		
     @property
     def current_file(self) -> Path:
@@ -73,13 +149,17 @@ class MainWindow(FramelessMainWindow):
         qr.moveCenter(cp)
         self.move(qr.topLeft())
 
-    def get_editor(self, path: Path = None, file_type=".py") -> QsciScintilla:
+    def get_editor(self, path: Path = None, file_type=".py", large_file=False) -> QsciScintilla:
         """Create a New Editor"""
         venv = None
         if len(self.envs) > 0:
             venv = self.envs[0]
+        editor = self.editor_pool.take()
+        if editor is not None:
+            editor.open(path, file_type, venv, large_file)
+            return editor
         # UPDATED EP 9
-        editor = Editor(self, path=path, env=venv, file_type=file_type)
+        editor = Editor(self, path=path, env=venv, file_type=file_type, large_file=large_file)
         return editor
 
     def set_cursor_pointer(self, e: QEnterEvent) -> None:
@@ -234,22 +314,21 @@ class MainWindow(FramelessMainWindow):
         self.search_checkbox.setFont(self.window_font)
         self.search_checkbox.setStyleSheet("color: white; margin-bottom: 10px;")
 
-        self.search_worker = SearchWorker()
-        self.search_worker.finished.connect(self.search_finished)
-        search_input.textChanged.connect(
-            lambda text: self.search_worker.update(
-                text,
-                self.file_manager.model.rootDirectory().absolutePath(),
-                self.search_checkbox.isChecked(),
-            )
-        )
+        self.search_worker = SearchWorker(self.search_workers)
+        self.search_worker.results_found.connect(self.search_results_found)
+        self.search_worker.set_root(os.getcwd())
+        self.search_id = 0
+        search_input.textChanged.connect(self.start_search)
 
         ###############################################
         ############## Search ListView ####################
-        self.search_list_view = QListWidget()
+        self.search_results = SearchResultsModel(self)
+        self.search_list_view = QListView()
         self.search_list_view.setFont(QFont("FiraCode", 13))
+        self.search_list_view.setModel(self.search_results)
+        self.search_list_view.setUniformItemSizes(True)
 
-        self.search_list_view.itemClicked.connect(self.search_list_view_clicked)
+        self.search_list_view.clicked.connect(self.search_list_view_clicked)
 
         search_layout.addWidget(self.search_checkbox)
         search_layout.addWidget(search_input)
@@ -326,6 +405,12 @@ class MainWindow(FramelessMainWindow):
         self.hsplit.addWidget(self.welcome_frame)
         self.current_side_bar = self.file_manager_frame
 
+        # Ctrl+P file finder
+        self.path_index = PathIndex(self)
+        self.path_index.folders_added.connect(self.file_watcher.watch_folders)
+        self.path_index.set_root(os.getcwd())
+        self.quick_open = QuickOpen(self, self.path_index)
+
         # header
         self.header = Heading(self)
         self.header.setStyleSheet(self.header.styleSheet() + "border: none; border-bottom: 1px solid #333641; border-bottom-left-radius: 0; border-bottom-right-radius: 0;")
@@ -365,15 +450,30 @@ class MainWindow(FramelessMainWindow):
         
         self.centralWidget().setStyleSheet(self.frame_stlye)
 
-    def search_finished(self, items):
-        self.search_list_view.clear()
-        for i in items:
-            self.search_list_view.addItem(i)
+    def start_search(self, text: str):
+        # the old results go now, the new ones come in batches
+        self.search_results.clear()
+        if not text:
+            # an empty pattern matches every line
+            self.search_worker.cancel()
+            return
+        self.search_id = self.search_worker.update(
+            text,
+            self.file_manager.model.rootDirectory().absolutePath(),
+            self.search_checkbox.isChecked(),
+        )
+
+    def search_results_found(self, search_id: int, results: list[tuple[str, int, int, str]]):
+        if search_id != self.search_id:
+            # batch of a search that has been replaced
+            return
+        self.search_results.add_results(results)
 
-    def search_list_view_clicked(self, item: SearchItem):
-        self.set_new_tab(Path(item.full_path))
+    def search_list_view_clicked(self, index: QModelIndex):
+        full_path, lineno, end = self.search_results.result(index.row())
+        self.set_new_tab(Path(full_path))
         editor: Editor = self.tab_view.currentWidget()
-        editor.setCursorPosition(item.lineno, item.end)
+        editor.setCursorPosition(lineno, end)
         editor.setFocus()
 
     def show_hide_tab(self, e: QMouseEvent, widget: str):
@@ -405,21 +505,113 @@ class MainWindow(FramelessMainWindow):
 
     def close_tab(self, index: int):
         # UPDATED EP 9
-        editor: Editor = self.tab_view.currentWidget()
+        editor: Editor = self.tab_view.widget(index)
         if editor.current_file_changed:
+            # save_file saves the current tab
+            self.tab_view.setCurrentIndex(index)
             dialog = self.show_dialog(
                 "Close", f"Do you want to save the changes made to {self.current_file.name}?"
             )
             if dialog == QMessageBox.Yes:
                 self.save_file()
 
-        self.tab_view.removeTab(index)
+        self.close_editor(editor)
+
+    def close_editor(self, editor: Editor):
+        """Remove the editor's tab without asking to save"""
+        for view in list(editor.views):
+            self.close_split(view)
+        self.documents.remove(editor)
+        self.tab_view.removeTab(self.tab_view.indexOf(editor))
+        if isinstance(editor, TabPlaceholder):
+            editor.deleteLater()
+        elif any(e is editor for e, _ in self.saving.values()):
+            # file_saved still needs it, it's dropped once the save is done
+            editor.release()
+            editor.setParent(None)
+        else:
+            self.editor_pool.put(editor)
+        # hides the progress bar if it was the last one loading
+        self.loading_finished()
+
+    def split_editor(self):
+        """Show the current file in another pane, the views share one document"""
+        editor = self.tab_view.currentWidget()
+        if not isinstance(editor, Editor):
+            return
+        if editor.loader is not None:
+            self.statusBar().showMessage(f"{editor.path.name} is still loading", 2000)
+            return
+        view = SplitView(editor)
+        self.hsplit.addWidget(view)
+        view.setFocus()
+
+    def close_split(self, view: SplitView):
+        view.detach()
+        view.setParent(None)
+        view.deleteLater()
 
     def tab_changed(self, index: int):
         # NEW EPISODE 8 
         editor = self.tab_view.widget(index)
+        if isinstance(editor, TabPlaceholder):
+            editor = self.show_placeholder(editor)
         if editor:
             self.current_file = editor.path
+            editor.wake()
+            editor.last_shown = time.monotonic()
+            self.hibernate_idle()
+
+    def show_placeholder(self, placeholder: TabPlaceholder) -> Editor:
+        """Put an editor with the file in place of a tab's placeholder"""
+        index = self.tab_view.indexOf(placeholder)
+        tab_text = self.tab_view.tabText(index)
+        path = placeholder.path
+        self.documents.remove(placeholder)
+
+        editor = None
+        if not path.is_file():
+            self.statusBar().showMessage(f"{path.name} doesn't exist anymore", 2000)
+        elif self.is_binary(path):
+            self.statusBar().showMessage("Cannot Open Binary File", 2000)
+        else:
+            editor = self.load_editor(path)
+            self.documents.add(path, editor)
+
+        # swapping the widgets shouldn't show the tabs next to it on the way
+        self.tab_view.blockSignals(True)
+        if editor is not None:
+            self.tab_view.insertTab(index, editor, tab_text)
+            self.tab_view.removeTab(index + 1)
+            self.tab_view.setCurrentIndex(index)
+        else:
+            self.tab_view.removeTab(index)
+        self.tab_view.blockSignals(False)
+        placeholder.deleteLater()
+
+        if editor is None:
+            # the tab that's current now may be a placeholder too
+            self.tab_changed(self.tab_view.currentIndex())
+            return None
+        if editor.loader is None:
+            editor.setFirstVisibleLine(placeholder.first_line)
+            editor.setCursorPosition(*placeholder.cursor)
+        self.setWindowTitle(f"{tab_text} - {self.app_name}")
+        return editor
+
+    def hibernate_idle(self):
+        """Drop the lexer and completion of the background tabs that are over the budget or idle"""
+        current = self.tab_view.currentWidget()
+        editors = [
+            e for e in map(self.tab_view.widget, range(self.tab_view.count()))
+            if isinstance(e, Editor) and e is not current and e.language_enabled
+        ]
+        editors.sort(key=lambda e: e.last_shown, reverse=True)
+        now = time.monotonic()
+        for i, editor in enumerate(editors):
+            # the current tab takes one of the slots
+            if i >= self.ACTIVE_EDITORS - 1 or now - editor.last_shown > self.IDLE_SECONDS:
+                editor.hibernate()
 
     # UPDATED EP 9 
     def set_up_status_bar(self):
@@ -430,6 +622,62 @@ class MainWindow(FramelessMainWindow):
         stat.showMessage("Ready", 3000)
         self.setStatusBar(stat)
 
+        # progress of large files being loaded
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setMaximumHeight(14)
+        self.load_progress.setTextVisible(False)
+        self.load_progress.hide()
+        stat.addPermanentWidget(self.load_progress)
+
+        # copies, moves and deletes of the file manager
+        self.operation_label = QLabel()
+        self.operation_label.hide()
+        stat.addPermanentWidget(self.operation_label)
+        self.operation_cancel = QPushButton("Cancel")
+        self.operation_cancel.setCursor(Qt.PointingHandCursor)
+        self.operation_cancel.clicked.connect(self.file_manager.operations.cancel)
+        self.operation_cancel.hide()
+        stat.addPermanentWidget(self.operation_cancel)
+
+        # metrics summary while they're recorded, the tooltip has all of them
+        self.metrics_label = QLabel()
+        self.metrics_label.hide()
+        stat.addPermanentWidget(self.metrics_label)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.update_metrics_label)
+
+    def set_metrics_enabled(self, enabled: bool):
+        metrics.enabled = enabled
+        self.metrics_label.setVisible(enabled)
+        if enabled:
+            self.update_metrics_label()
+            self.metrics_timer.start()
+        else:
+            self.metrics_timer.stop()
+
+    def update_metrics_label(self):
+        self.metrics_label.setText(metrics.summary())
+        self.metrics_label.setToolTip(metrics.table())
+
+    def export_metrics(self):
+        file_path = QFileDialog.getSaveFileName(self, "Export Metrics", os.getcwd(), "JSON (*.json)")[0]
+        if file_path == "":
+            return
+        try:
+            metrics.export(file_path)
+        except OSError as err:
+            print("Metrics Error:", err)
+            self.statusBar().showMessage(f"Failed to export metrics: {err}", 3000)
+            return
+        self.statusBar().showMessage(f"Exported metrics to {Path(file_path).name}", 2000)
+
+    def reset_metrics(self):
+        metrics.reset()
+        if metrics.enabled:
+            self.update_metrics_label()
+
     def is_binary(self, path):
         """
         Check if file is binary
@@ -442,9 +690,25 @@ class MainWindow(FramelessMainWindow):
         if t is not None:
             t.copy()
 
-    def set_new_tab(self, path: Path, is_new_file=False):
+    def open_files(self, paths: list[Path]):
+        """Open several files, only the last one is read now and the rest when their tab is first shown"""
+        for path in paths[:-1]:
+            self.set_new_tab(path, lazy=True)
+        if paths:
+            self.set_new_tab(paths[-1])
+
+    def set_new_tab(self, path: Path, is_new_file=False, lazy=False):
+        # check if file is already open, before anything is read or built for it
+        if not is_new_file:
+            editor = self.documents.get(path)
+            if editor is not None:
+                # set the active tab to that
+                self.tab_view.setCurrentWidget(editor)
+                self.current_file = editor.path
+                return
+
         # UPDATED EP 9
-        if not is_new_file and self.is_binary(path):
+        if not is_new_file and not lazy and self.is_binary(path):
             self.statusBar().showMessage("Cannot Open Binary File", 2000)
             return
         
@@ -456,9 +720,15 @@ class MainWindow(FramelessMainWindow):
             if idx != -1:
                 self.hsplit.replaceWidget(idx, self.tab_view)
 
-        text_edit = self.get_editor(path, path.suffix)
-        
+        if lazy:
+            # the tab is all there is until it's shown
+            placeholder = TabPlaceholder(path)
+            self.documents.add(path, placeholder)
+            self.tab_view.addTab(placeholder, path.name)
+            return
+
         if is_new_file:
+            text_edit = self.get_editor(path, path.suffix)
             self.tab_view.addTab(text_edit, "untitled")
             self.setWindowTitle("untitled - " + self.app_name)
             self.statusBar().showMessage(f"Opened untitled", 2000)
@@ -466,23 +736,42 @@ class MainWindow(FramelessMainWindow):
             self.current_file = None
             return
 
-        # check if file is already open
-        for i in range(self.tab_view.count()):
-            # UPDATED EP 9
-            if self.tab_view.tabText(i) == path.name or self.tab_view.tabText(i) == "*"+path.name: # check for unsaved state too
-                # set the active tab to that
-                self.tab_view.setCurrentIndex(i)
-                self.current_file = path
-                return
-
+        text_edit = self.load_editor(path)
+        self.documents.add(path, text_edit)
         self.tab_view.addTab(text_edit, path.name)
-        text_edit.setText(path.read_text(encoding="utf-8"))
         self.setWindowTitle(f"{path.name} - {self.app_name}")
-        self.statusBar().showMessage(f"Opened {path.name}", 2000)
         # set the active tab to that
         self.tab_view.setCurrentIndex(self.tab_view.count() - 1)
         self.current_file = path
 
+    def load_editor(self, path: Path) -> Editor:
+        """An editor with the file in it, big files are still being read when it's returned"""
+        large_file = path.stat().st_size >= LARGE_FILE_SIZE
+        text_edit = self.get_editor(path, path.suffix, large_file)
+        if large_file:
+            # shown right away and filled in as it's read
+            text_edit.load_progress.connect(self.loading_progress)
+            text_edit.load_finished.connect(self.loading_finished)
+            text_edit.load()
+            self.statusBar().showMessage(f"Opening {path.name} in large file mode, right click to turn on highlighting", 5000)
+        else:
+            text_edit.setText(path.read_text(encoding="utf-8"))
+            self.statusBar().showMessage(f"Opened {path.name}", 2000)
+        return text_edit
+
+    def loading_progress(self, read: int, total: int):
+        self.load_progress.setMaximum(max(1, total // 1024))
+        self.load_progress.setValue(read // 1024)
+        self.load_progress.show()
+
+    def loading_finished(self):
+        loading = [
+            e for e in map(self.tab_view.widget, range(self.tab_view.count()))
+            if e.loader is not None
+        ]
+        if not loading:
+            self.load_progress.hide()
+
     def new_file(self):
         # create new file
         self.set_new_tab(Path("untitled"), True)
@@ -498,10 +787,10 @@ class MainWindow(FramelessMainWindow):
             return
 
         text_edit = self.tab_view.currentWidget()
-        self.current_file.write_text(text_edit.text())
-        self.statusBar().showMessage(f"Saved {self.current_file.name}", 2000)
-        # UPDATED EP 9
-        text_edit.current_file_changed = False
+        if text_edit.loader is not None:
+            self.statusBar().showMessage(f"{self.current_file.name} is still loading", 2000)
+            return
+        self.write_file(text_edit, self.current_file)
 
     def save_as(self):
         # save as
@@ -509,29 +798,105 @@ class MainWindow(FramelessMainWindow):
         text_edit = self.tab_view.currentWidget()
         if text_edit is None:
             return
+        if text_edit.loader is not None:
+            self.statusBar().showMessage(f"{text_edit.path.name} is still loading", 2000)
+            return
         file_path = QFileDialog.getSaveFileName(self, "Save As", os.getcwd())[0]
         if file_path == "":
             self.statusBar().showMessage("Cancelled", 2000)
             return
         path = Path(file_path)
-        path.write_text(text_edit.text())
+        other = self.documents.get(path)
+        if other is not None and other is not text_edit:
+            # open in another tab, this one takes its place
+            if isinstance(other, Editor) and other.current_file_changed:
+                dialog = self.show_dialog(
+                    "Save As", f"{path.name} is open in another tab with unsaved changes, replace it?"
+                )
+                if dialog != QMessageBox.Yes:
+                    self.statusBar().showMessage("Cancelled", 2000)
+                    return
+            self.close_editor(other)
         # new
         self.current_file = path
-        self.tab_view.setTabText(self.tab_view.currentIndex(), path.name)
-        self.statusBar().showMessage(f"Saved {path.name}", 2000)
-
-        # UPDATED EP 9
-        editor: Editor = self.tab_view.currentWidget()
-        editor.current_file_changed = False
+        text_edit.path = path
+        text_edit.full_path = path.absolute()
+        self.documents.add(path, text_edit)
+        # still unsaved until the saver is done with it
+        self.tab_view.setTabText(self.tab_view.currentIndex(), "*" + path.name)
+        text_edit.current_file_changed = True
+        self.write_file(text_edit, path)
+
+    def write_file(self, editor: Editor, path: Path):
+        """Save a snapshot of the editor's text in the background, it's marked saved once it's written"""
+        key = str(path)
+        self.saving[key] = (editor, editor.change_count)
+        self.file_saver.save(key, editor.text().encode("utf-8"), editor.change_count)
+        self.statusBar().showMessage(f"Saving {path.name}...")
+
+    def file_saved(self, path: str, token: int):
+        editor, latest = self.saving.get(path, (None, None))
+        if token == latest:
+            del self.saving[path]
+            # typing after the snapshot was taken keeps it unsaved
+            if editor.change_count == token:
+                # UPDATED EP 9
+                editor.current_file_changed = False
+            # the watcher sees this write too, it isn't someone else's change
+            editor.disk_signature = FileWatcher.signature(path)
+            # a save as target didn't exist when it was registered, it can be watched now
+            key = self.documents.keys.get(editor)
+            if key is not None:
+                self.file_watcher.watch_files([key])
+        self.statusBar().showMessage(f"Saved {Path(path).name}", 2000)
+
+    def file_save_failed(self, path: str, err: str):
+        self.saving.pop(path, None)
+        self.statusBar().showMessage(f"Failed to save {Path(path).name}: {err}", 5000)
+
+    def files_changed(self, folders: list[str], files: list[str]):
+        """A batch of changes from the file watcher, the indexes are updated from it and the open files reloaded"""
+        self.path_index.folders_changed(folders)
+        self.search_worker.files_changed(folders, files)
+        for path in files:
+            editor = self.documents.get(path)
+            # tabs that were never shown read the file when they are
+            if isinstance(editor, Editor):
+                self.reload_editor(editor)
+
+    def reload_editor(self, editor: Editor):
+        """Bring an open file up to date with a change made outside the editor"""
+        name = editor.path.name
+        signature = FileWatcher.signature(str(editor.path))
+        if signature is None:
+            self.statusBar().showMessage(f"{name} was deleted from disk", 5000)
+            return
+        if signature == editor.disk_signature:
+            return
+        if editor.current_file_changed:
+            # not throwing away unsaved changes
+            self.statusBar().showMessage(f"{name} changed on disk, it has unsaved changes", 5000)
+            return
+        if editor.loader is not None or editor.large_file:
+            self.statusBar().showMessage(f"{name} changed on disk, reopen it to see the changes", 5000)
+            return
+        try:
+            text = editor.path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as err:
+            print("Reload Error:", err)
+            return
+        editor.disk_signature = signature
+        if editor.reload(text):
+            self.statusBar().showMessage(f"Reloaded {name}", 2000)
 
     def open_file_dlg(self):
-        new_file, _ = QFileDialog.getOpenFileName(
-            self, "Pick A File", "", "All Files (*);;Python Files (*.py)"
+        new_files, _ = QFileDialog.getOpenFileNames(
+            self, "Pick Files", "", "All Files (*);;Python Files (*.py)"
         )
+        self.open_files([Path(f) for f in new_files])
 
-        if new_file:
-            f = Path(new_file)
-            self.set_new_tab(f)
+    def go_to_file(self):
+        self.quick_open.popup()
 
     def open_folder(self):
         new_folder = QFileDialog.getExistingDirectory(
@@ -542,14 +907,52 @@ class MainWindow(FramelessMainWindow):
             self.file_manager.setRootIndex(self.file_manager.model.index(new_folder))
             self.statusBar().showMessage(f"Opened {new_folder}", 2000)
             self.current_dir_lbl.setText(Path(new_folder).name)
-
-            self.tab_view.clear()
+            self.jedi_project.set_root(new_folder)
+            # the old folder's venv is used until the new folder's are found
+            self.find_environments(new_folder)
+            self.search_worker.set_root(new_folder)
+            self.file_watcher.clear_folders()
+            self.path_index.set_root(new_folder)
+            if self.completion_server is not None:
+                self.completion_server.set_project(new_folder, self.jedi_project.env)
+
+            for editor in list(map(self.tab_view.widget, range(self.tab_view.count()))):
+                self.close_editor(editor)
             idx = self.hsplit.indexOf(self.tab_view)
             if idx != -1:
                 self.hsplit.replaceWidget(idx, self.welcome_frame)
 
     
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "files", nargs="*",
+        help="files to open, each one is read when its tab is first shown",
+    )
+    parser.add_argument(
+        "--completion-workers", type=int, default=0,
+        help="run autocompletion in this many worker processes",
+    )
+    parser.add_argument(
+        "--search-workers", type=int, default=0,
+        help="search files in this many worker processes",
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="print how long each phase of starting up took",
+    )
+    parser.add_argument(
+        "--poll-files", action="store_true",
+        help="look for changes to files by polling, for file systems that don't report them",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true",
+        help="record timings of lexing, completion and search from the start (Tools > Record Metrics)",
+    )
+    args = parser.parse_args()
+    profile = StartupProfile(STARTED, args.profile_startup)
+    profile.mark("imports")
+
     QApplication.setHighDpiScaleFactorRoundingPolicy(
     Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
@@ -557,7 +960,26 @@ if __name__ == "__main__":
 
     app = QApplication([])
     app.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings)
+    profile.mark("qapplication")
 
-    window = MainWindow()
+    window = MainWindow(
+        completion_workers=args.completion_workers, search_workers=args.search_workers, profile=profile,
+        poll_files=args.poll_files,
+    )
     app.installEventFilter(window.header)
-    sys.exit(app.exec_())
+    if args.metrics:
+        window.header.menu.record_metrics.setChecked(True)
+    window.open_files([Path(f) for f in args.files])
+    profile.mark("window")
+    # runs once the event loop has painted the window
+    profile.expect("first paint")
+    QTimer.singleShot(0, lambda: profile.mark("first paint"))
+    exit_code = app.exec_()
+    if window.completion_server is not None:
+        window.completion_server.shutdown()
+    window.search_worker.shutdown()
+    # copies and deletes still running are stopped, a copy removes what it had copied
+    window.file_manager.operations.shutdown()
+    # whatever is still being saved gets written before exiting
+    window.file_saver.shutdown()
+    sys.exit(exit_code)
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+
+
+class Histogram:
+    """Durations in power of two buckets of microseconds, good enough for percentiles"""
+
+    BUCKETS = 40 # the last one holds everything above 2**38 us, about 3 days
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float):
+        us = int(seconds * 1_000_000)
+        self.buckets[min(us.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound in seconds of the bucket the p-th percentile falls in"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min((1 << i) / 1_000_000, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            # bucket i holds durations below 2**i microseconds
+            "buckets": {str(1 << i): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Metrics:
+    """Timings and counts of the hot paths, lexing, completion and search.
+
+    Everything is off until enabled is set, call sites check it before
+    taking any time so a disabled recorder costs one attribute lookup.
+    Durations are in seconds.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, float] = {}
+        self.started = time.time()
+        self.lock = threading.Lock() # search and completion record from their threads
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name: str, n: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def rate(self, counter: str, histogram: str) -> float:
+        """counter per second of the time recorded in histogram"""
+        h = self.histograms.get(histogram)
+        if h is None or not h.total:
+            return None
+        return self.counters.get(counter, 0) / h.total
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            data = {
+                "started": self.started,
+                "histograms": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+        data["rates"] = {
+            "lexer.bytes_per_second": self.rate("lexer.bytes", "lexer.style"),
+            "search.files_per_second": self.rate("search.files", "search.time"),
+            "search.bytes_per_second": self.rate("search.bytes", "search.time"),
+        }
+        return data
+
+    def export(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+    def summary(self) -> str:
+        """One line for the status bar"""
+        parts = []
+        style = self.histograms.get("lexer.style")
+        if style is not None:
+            parts.append(f"style p50 {style.percentile(50) * 1000:.1f}ms")
+        completion = self.histograms.get("completion.latency")
+        if completion is not None:
+            parts.append(f"completion p50 {completion.percentile(50) * 1000:.0f}ms")
+        search = self.rate("search.bytes", "search.time")
+        if search is not None:
+            parts.append(f"search {search / 1_000_000:.1f}MB/s")
+        return " | ".join(parts) or "no metrics yet"
+
+    def table(self) -> str:
+        """Every histogram and counter, for the status bar widget's tooltip"""
+        lines = []
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                lines.append(
+                    f"{name}: {h.count}x  p50 {h.percentile(50) * 1000:.2f}ms"
+                    f"  p90 {h.percentile(90) * 1000:.2f}ms  max {h.max * 1000:.2f}ms"
+                )
+            for name, n in sorted(self.counters.items()):
+                lines.append(f"{name}: {n:g}")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
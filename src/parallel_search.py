@@ -0,0 +1,196 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable
+import heapq
+import mmap
+import multiprocessing
+import os
+import re
+
+# kept free of Qt so the worker processes start quickly
+
+# patterns where bytes and text matching can differ on non-ascii text,
+# . and [^...] match one byte of a character instead of all of it
+UNICODE_AWARE = re.compile(r"\\[wWbBdDsS]|[^\x00-\x7f]|\.|\[\^")
+NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+_pattern = (None, None) # (text, compiled) of the last pattern this process saw
+
+
+def compile_pattern(pattern: str) -> tuple[re.Pattern, re.Pattern]:
+    """(bytes, text) regexes of a search for scan_file, bytes is None if the text one is always needed"""
+    flags = re.IGNORECASE | re.MULTILINE
+    text = re.compile(pattern, flags)
+    try:
+        raw = re.compile(pattern.encode("utf-8"), flags)
+    except re.error:
+        # \u escapes, \N{...} and the like
+        raw = None
+    return raw, (text if raw is None or UNICODE_AWARE.search(pattern) else None)
+
+
+def scan_file(patterns: tuple[re.Pattern, re.Pattern], path: str) -> list[tuple[int, int, str]]:
+    """(line number, end, line) of the first hit on every line of the file at path
+
+    The bytes regex runs over the whole mapped file instead of line by
+    line, line numbers are only counted up to the hits and only the text
+    shown for a hit is decoded. Files with non-ascii text are decoded
+    first for patterns where that changes what matches, like \\w, \\b,
+    . or [^...]. Binary files and files that can't be read have no hits.
+    """
+    try:
+        with open(path, "rb") as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty
+                return []
+    except OSError:
+        return []
+
+    raw, text = patterns
+    with buf:
+        if buf.find(b"\0", 0, 1024) != -1:
+            return []
+        data = buf
+        if buf.find(b"\r") != -1:
+            # the same lines a file opened in text mode has
+            data = buf[:].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if raw is None or text is not None and NON_ASCII.search(data):
+            return _scan_lines(text, str(data[:], "utf-8", errors="replace"), "\n")
+        return _scan_lines(raw, data, b"\n")
+
+
+def _scan_lines(r: re.Pattern, buf, newline) -> list[tuple[int, int, str]]:
+    results = []
+    size = len(buf)
+    pos = 0
+    lineno = 0
+    counted = 0 # lineno is the line of this offset
+    while m := r.search(buf, pos):
+        line_start = buf.rfind(newline, 0, m.start()) + 1
+        if line_start == size and size:
+            # empty match after the last newline, there's no line there
+            break
+        line_end = buf.find(newline, m.start())
+        line_end = size if line_end == -1 else line_end + 1
+        if m.end() > line_end:
+            # hits never span lines, look again on this line alone
+            m = r.search(buf, line_start, line_end)
+            if m is None:
+                if line_end >= size:
+                    break
+                pos = line_end
+                continue
+
+        lineno += buf[counted:line_start].count(newline)
+        counted = line_start
+        if isinstance(buf, str):
+            end = m.end() - line_start
+            snippet = buf[m.start():min(line_end, m.start() + 200)]
+        else:
+            # columns are in characters like the editor's
+            end = len(buf[line_start:m.end()].decode("utf-8", errors="replace"))
+            snippet = buf[m.start():min(line_end, m.start() + 200)].decode("utf-8", errors="replace")
+        results.append((lineno, end, snippet.strip()[:50]))
+
+        if line_end >= size:
+            break
+        pos = line_end
+    return results
+
+
+def scan_chunk(pattern: str, files: list[tuple[int, str]]) -> list[tuple[int, int, int, str]]:
+    """Search files in a worker, returns (file order, line number, end, line) for every hit"""
+    global _pattern
+    if _pattern[0] != pattern:
+        _pattern = (pattern, compile_pattern(pattern))
+    r = _pattern[1]
+
+    results = []
+    for order, path in files:
+        results.extend((order, lineno, end, line) for lineno, end, line in scan_file(r, path))
+    return results
+
+
+class ParallelScanner:
+    """Searches files over a pool of processes, the pool is kept between searches"""
+
+    # the first chunks are small so the first hits show right away, every chunk is twice
+    # as big as the last up to MAX_CHUNK_BYTES
+    MIN_CHUNK_BYTES = 64 * 1024
+    MAX_CHUNK_BYTES = 4 * 1024 * 1024
+    MAX_CHUNK_FILES = 512 # lots of tiny files cost more to open than to search
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.pool: ProcessPoolExecutor = None
+
+    def scan(self, pattern: str, paths: Iterable[str], cancelled=lambda: False):
+        """Yields batches of (path, line number, end, line) of the hits in the order of paths
+
+        paths can be the walk of a folder, chunks of it are searched while it's
+        still walked. A batch is given as soon as every chunk before its hits
+        is done, the pending chunks are dropped once cancelled() returns True.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        walked = [] # every path so far, the hits refer to them by their index
+        pending = {} # future -> order of the first file in its chunk
+        ready = [] # heap of hits that may still have to wait for an earlier chunk
+        chunk = []
+        size = 0
+        target = self.MIN_CHUNK_BYTES
+        try:
+            for path in paths:
+                if cancelled():
+                    return
+                chunk.append((len(walked), path))
+                walked.append(path)
+                try:
+                    size += os.path.getsize(path)
+                except OSError:
+                    pass
+                if size >= target or len(chunk) >= self.MAX_CHUNK_FILES:
+                    pending[self.pool.submit(scan_chunk, pattern, chunk)] = chunk[0][0]
+                    chunk = []
+                    size = 0
+                    target = min(target * 2, self.MAX_CHUNK_BYTES)
+                    # hand out what's done so far without holding up the walk
+                    batch = self.collect(pending, ready, walked, 0)
+                    if batch:
+                        yield batch
+            if chunk:
+                pending[self.pool.submit(scan_chunk, pattern, chunk)] = chunk[0][0]
+
+            while pending:
+                batch = self.collect(pending, ready, walked, 0.05)
+                if cancelled():
+                    return
+                if batch:
+                    yield batch
+        finally:
+            # cancelled, or the caller has all the hits it wants
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def collect(pending: dict, ready: list, walked: list[str], timeout: float) -> list[tuple[int, int, str]]:
+        """Wait up to timeout for chunks to finish, returns the hits that no pending chunk comes before"""
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            del pending[future]
+            for hit in future.result():
+                heapq.heappush(ready, hit)
+
+        first_pending = min(pending.values(), default=len(walked))
+        batch = []
+        while ready and ready[0][0] < first_pending:
+            order, lineno, end, line = heapq.heappop(ready)
+            batch.append((walked[order], lineno, end, line))
+        return batch
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,92 @@
+from PyQt5.QtWidgets import QFrame, QVBoxLayout, QLineEdit, QListWidget
+from PyQt5.QtCore import Qt, QEvent, QObject
+from PyQt5.QtGui import QFont, QKeyEvent
+
+from fuzzy_searcher import PathIndex
+
+from typing import TYPE_CHECKING
+from pathlib import Path
+
+if TYPE_CHECKING:
+    from main import MainWindow
+
+
+class QuickOpen(QFrame):
+    """Ctrl+P popup to open a file of the folder by fuzzy matching its path"""
+
+    RESULTS = 50
+
+    def __init__(self, main_window: "MainWindow", index: PathIndex):
+        super(QuickOpen, self).__init__(main_window)
+        self.main_window = main_window
+        self.index = index
+
+        self.setStyleSheet(
+        """
+            QFrame {
+                background-color: #21252b;
+                border-radius: 5px;
+                border: 1px solid #333641;
+                color: #D3D3D3;
+            }
+        """
+        )
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Go to file")
+        self.input.setFont(QFont("FiraCode", 12))
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.open_selected)
+        self.input.installEventFilter(self)
+
+        self.results = QListWidget()
+        self.results.setFont(QFont("FiraCode", 12))
+        self.results.itemActivated.connect(self.open_selected)
+
+        layout.addWidget(self.input)
+        layout.addWidget(self.results)
+
+        self.index.changed.connect(self.index_changed)
+        self.hide()
+
+    def popup(self):
+        width = min(600, self.main_window.width() - 40)
+        self.setGeometry((self.main_window.width() - width) // 2, 60, width, 400)
+        self.input.clear()
+        self.update_results("")
+        self.show()
+        self.raise_()
+        self.input.setFocus()
+
+    def update_results(self, text: str):
+        self.results.clear()
+        self.results.addItems(self.index.find(text, self.RESULTS))
+        self.results.setCurrentRow(0)
+
+    def index_changed(self):
+        if self.isVisible():
+            self.update_results(self.input.text())
+
+    def open_selected(self, *args):
+        item = self.results.currentItem()
+        if item is None:
+            return
+        self.hide()
+        self.main_window.set_new_tab(Path(self.index.root) / item.text())
+
+    def eventFilter(self, obj: QObject, e: QEvent) -> bool:
+        # the list is moved from the input so typing never loses focus
+        if obj is self.input and e.type() == QEvent.KeyPress:
+            key = QKeyEvent(e).key()
+            if key in (Qt.Key_Down, Qt.Key_Up):
+                step = 1 if key == Qt.Key_Down else -1
+                row = max(0, min(self.results.count() - 1, self.results.currentRow() + step))
+                self.results.setCurrentRow(row)
+                return True
+            if key == Qt.Key_Escape:
+                self.hide()
+                self.main_window.setFocus()
+                return True
+        return super().eventFilter(obj, e)
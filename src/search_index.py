@@ -0,0 +1,244 @@
+from array import array
+from pathlib import Path
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+
+try:
+    from re import _parser as sre_parse
+except ImportError: # python < 3.11
+    import sre_parse
+
+
+INDEX_DIR = Path.home() / ".neutron" / "search-index"
+MAX_INDEXED_SIZE = 4 * 1024 * 1024 # bigger files are always searched
+
+# kinds of files in the index
+TEXT = 0
+BINARY = 1 # never searched
+UNINDEXED = 2 # too big, always searched
+
+TRIGRAM = re.compile(rb"...", re.DOTALL)
+
+
+def trigrams(data: bytes) -> set[bytes]:
+    """Every 3 byte sequence in data, ascii is lowercased since searches ignore case"""
+    data = data.lower()
+    found = set(TRIGRAM.findall(data))
+    found.update(TRIGRAM.findall(data, 1))
+    found.update(TRIGRAM.findall(data, 2))
+    return found
+
+
+def required_literals(pattern: str) -> list[str]:
+    """Strings every match of the regex has to contain, only ascii is kept
+
+    This doesn't try to be complete, anything it doesn't understand (branches,
+    classes, optional parts) just ends the current literal.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError):
+        return []
+    literals = []
+    _collect_literals(parsed, literals)
+    return [i for i in literals if len(i) >= 3]
+
+
+def _collect_literals(items, literals: list[str]):
+    run = []
+    for op, av in items:
+        if op is sre_parse.LITERAL and av < 128:
+            run.append(chr(av))
+            continue
+        literals.append("".join(run))
+        run = []
+        if op is sre_parse.SUBPATTERN:
+            _collect_literals(av[-1], literals)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            _collect_literals(av[2], literals)
+    literals.append("".join(run))
+
+
+class TrigramIndex:
+    """Trigram inverted index of the files under a folder, saved between runs.
+
+    Every indexed file gets an id and each trigram maps to the ids of the
+    files containing it, so a search only has to read the files that have
+    all the trigrams of its pattern. A file that changed gets a new id and
+    the old one is left dead in the postings until the index is compacted.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root, index_dir: Path = INDEX_DIR):
+        self.root = Path(root).resolve()
+        self.path = Path(index_dir) / (hashlib.sha1(str(self.root).encode()).hexdigest() + ".pickle")
+
+        self.ids: dict[str, int] = {} # path -> file id
+        self.files: list[tuple] = [] # file id -> (path, mtime_ns, size, kind), None when dead
+        self.postings: dict[bytes, array] = {} # trigram -> file ids
+        self.dead = 0
+        self.changed = False
+        self.query_end = 0 # files indexed after the last candidates() call aren't in its result
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as err:
+            print("Search Index Error:", err)
+            return False
+
+        if data.get("version") != self.VERSION or data.get("root") != str(self.root):
+            return False
+        self.files = data["files"]
+        self.postings = data["postings"]
+        self.ids = {f[0]: i for i, f in enumerate(self.files) if f is not None}
+        self.dead = len(self.files) - len(self.ids)
+        self.changed = False
+        return True
+
+    def save(self):
+        if not self.changed:
+            return
+        if self.dead > len(self.ids):
+            self.compact()
+
+        data = {"version": self.VERSION, "root": str(self.root), "files": self.files, "postings": self.postings}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # its own temp file every time, a save from another window can't write into it
+            fd, tmp = tempfile.mkstemp(prefix=self.path.stem + ".", suffix=".tmp", dir=self.path.parent)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+            self.changed = False
+        except OSError as err:
+            print("Search Index Error:", err)
+
+    def compact(self):
+        """Drop dead ids from the postings and number the files again"""
+        remap = {}
+        files = []
+        for i, f in enumerate(self.files):
+            if f is not None:
+                remap[i] = len(files)
+                files.append(f)
+
+        postings = {}
+        for trigram, ids in self.postings.items():
+            ids = array("I", [remap[i] for i in ids if i in remap])
+            if ids:
+                postings[trigram] = ids
+
+        self.files = files
+        self.postings = postings
+        self.ids = {f[0]: i for i, f in enumerate(files)}
+        self.dead = 0
+        self.changed = True
+
+    def remove(self, path: str):
+        file_id = self.ids.pop(path, None)
+        if file_id is not None:
+            self.files[file_id] = None
+            self.dead += 1
+            self.changed = True
+
+    def update(self, path: str, stat: os.stat_result = None) -> int:
+        """Index path unless the index already has this version of it, returns its id"""
+        if stat is None:
+            stat = os.stat(path)
+        file_id = self.ids.get(path)
+        if file_id is not None:
+            _, mtime, size, _ = self.files[file_id]
+            if mtime == stat.st_mtime_ns and size == stat.st_size:
+                return file_id
+            self.remove(path)
+
+        kind = UNINDEXED
+        found = ()
+        if stat.st_size <= MAX_INDEXED_SIZE:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                if b"\0" in data[:1024]:
+                    kind = BINARY
+                else:
+                    kind = TEXT
+                    found = trigrams(data)
+            except OSError:
+                kind = BINARY
+
+        file_id = len(self.files)
+        self.files.append((path, stat.st_mtime_ns, stat.st_size, kind))
+        self.ids[path] = file_id
+        for trigram in found:
+            ids = self.postings.get(trigram)
+            if ids is None:
+                self.postings[trigram] = array("I", [file_id])
+            else:
+                ids.append(file_id)
+        self.changed = True
+        return file_id
+
+    def refresh(self, paths):
+        """Bring the index up to date with paths, files missing from it are dropped"""
+        seen = set()
+        for path in paths:
+            try:
+                self.update(path)
+            except OSError:
+                continue
+            seen.add(path)
+        for path in list(self.ids):
+            if path not in seen:
+                self.remove(path)
+
+    def candidates(self, pattern: str) -> set[int]:
+        """Ids of the files that may match pattern, None when every file may"""
+        self.query_end = len(self.files)
+        needed = set()
+        for literal in required_literals(pattern):
+            needed.update(trigrams(literal.encode()))
+        if not needed:
+            return None
+
+        postings = []
+        for trigram in needed:
+            ids = self.postings.get(trigram)
+            if ids is None:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def may_match(self, path: str, candidates: set[int]) -> bool:
+        """Check if the file at path has to be searched for a pattern's candidates"""
+        try:
+            file_id = self.update(path)
+        except OSError:
+            return False
+        kind = self.files[file_id][3]
+        if kind == BINARY:
+            return False
+        if kind == UNINDEXED or candidates is None or file_id >= self.query_end:
+            return True
+        return file_id in candidates
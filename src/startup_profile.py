@@ -0,0 +1,53 @@
+import time
+
+
+class StartupProfile:
+    """Time spent in each phase of starting up, printed with --profile-startup
+
+    Phases on the gui thread run one after the other, background phases
+    like finding environments overlap them and are timed on their own.
+    """
+
+    def __init__(self, started: float, enabled=False):
+        self.enabled = enabled
+        self.started = started
+        self.last = started
+        self.phases: list[tuple[str, float, float]] = [] # name, start, end
+        self.waiting: set[str] = set() # phases that have to end before the report
+
+    def mark(self, name: str):
+        """End the phase name, it started where the last one ended"""
+        now = time.perf_counter()
+        self.phases.append((name, self.last, now))
+        self.last = now
+        self.done(name)
+
+    def begin(self, name: str):
+        self.waiting.add(name)
+        self.phases.append((name, time.perf_counter(), None))
+
+    def end(self, name: str):
+        """End a background phase started with begin"""
+        now = time.perf_counter()
+        for i, (phase, start, end) in enumerate(self.phases):
+            if phase == name and end is None:
+                self.phases[i] = (phase, start, now)
+        self.done(name)
+
+    def expect(self, *names: str):
+        self.waiting.update(names)
+
+    def done(self, name: str):
+        if name not in self.waiting:
+            return
+        self.waiting.discard(name)
+        if self.enabled and not self.waiting:
+            self.report()
+            self.enabled = False
+
+    def report(self):
+        print("startup profile (ms)     took   done at")
+        for name, start, end in sorted(self.phases, key=lambda p: p[2] or 0):
+            if end is None:
+                continue
+            print(f"  {name:<20} {(end - start) * 1000:8.1f} {(end - self.started) * 1000:9.1f}")
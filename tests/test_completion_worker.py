@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import completion_worker
+from completion_worker import worker_main
+
+
+@pytest.fixture
+def worker(tmp_path):
+    conn, child_conn = multiprocessing.Pipe()
+    thread = threading.Thread(target=worker_main, args=(child_conn, str(tmp_path), None), daemon=True)
+    thread.start()
+    yield conn
+    conn.close()
+    child_conn.close()
+
+
+def test_deltas_and_resync(tmp_path, worker):
+    path = str(tmp_path / "x.py")
+    worker.send(("complete", 1, 0, path, None, [], 1, 0))
+    assert worker.recv() == ("resync", 1)
+
+    worker.send(("complete", 2, 0, path, b"import os\nos.pat", [], 2, 6))
+    assert "path" in worker.recv()[2]
+    # "os.pat" -> "os.sep"
+    worker.send(("complete", 3, 0, path, None, [(13, 16, b"se")], 2, 5))
+    assert "sep" in worker.recv()[2]
+
+
+def test_no_qt_in_workers():
+    # the spawned workers import the module worker_main is in
+    code = "import sys, completion_worker; print(any(m.startswith('PyQt5') for m in sys.modules))"
+    src = os.path.dirname(completion_worker.__file__)
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,40 @@
+from documents import DocumentRegistry
+
+
+class FakeWatcher:
+    def __init__(self):
+        self.files = set()
+
+    def watch_files(self, paths):
+        self.files.update(paths)
+
+    def unwatch_files(self, paths):
+        self.files.difference_update(paths)
+
+
+def test_add_path_open_in_another_editor(tmp_path):
+    # save as onto a file that's open in another tab
+    watcher = FakeWatcher()
+    documents = DocumentRegistry(watcher)
+    first, second = object(), object()
+    documents.add(tmp_path / "a.py", first)
+    documents.add(tmp_path / "b.py", second)
+
+    assert documents.add(tmp_path / "a.py", second) is first
+    assert documents.get(tmp_path / "a.py") is second
+    assert first not in documents.keys
+    assert len(documents) == 1
+    assert watcher.files == {str(tmp_path / "a.py")}
+
+    # removing the displaced editor's tab leaves the new one alone
+    documents.remove(first)
+    assert documents.get(tmp_path / "a.py") is second
+    assert watcher.files == {str(tmp_path / "a.py")}
+
+
+def test_add_same_editor_again(tmp_path):
+    documents = DocumentRegistry()
+    editor = object()
+    assert documents.add(tmp_path / "a.py", editor) is None
+    assert documents.add(tmp_path / "a.py", editor) is None
+    assert len(documents) == 1
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from file_operations import Cancelled, FileJob, FileOperations
+
+
+@pytest.fixture
+def operations():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    ops = FileOperations()
+    yield ops
+    ops.shutdown()
+
+
+def test_cancel_copy_of_empty_files(tmp_path, operations):
+    source = tmp_path / "source"
+    source.mkdir()
+    for i in range(200):
+        (source / f"empty{i}").touch()
+    target = tmp_path / "target"
+
+    job = FileJob("copy", source, target)
+    copied = threading.Event()
+    copy_file = operations.copy_file
+    def cancel_after_first(job, src, dst):
+        if copied.is_set():
+            job.cancelled = True
+        copied.set()
+        return copy_file(job, src, dst)
+    operations.copy_file = cancel_after_first
+
+    with pytest.raises(Cancelled):
+        operations.copy(job)
+    assert job.files == 1
+    # what was copied is removed again
+    assert not target.exists()
+
+
+def test_copy_tree(tmp_path, operations):
+    source = tmp_path / "source"
+    (source / "sub").mkdir(parents=True)
+    (source / "sub" / "file.txt").write_text("text")
+    (source / "empty").touch()
+
+    job = FileJob("copy", source, tmp_path / "target")
+    operations.copy(job)
+    assert (tmp_path / "target" / "sub" / "file.txt").read_text() == "text"
+    assert job.files == 2 and job.bytes == 4
@@ -0,0 +1,49 @@
+import os
+import time
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from file_watcher import FileWatcher
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    monkeypatch.setattr(FileWatcher, "DEBOUNCE_MS", 20)
+    watcher = FileWatcher()
+    watcher.batches = []
+    watcher.changed.connect(lambda folders, files: watcher.batches.append((folders, files)))
+    yield watcher
+
+
+def wait_for(watcher, path, timeout=3):
+    """Run the event loop until a batch has path in its files"""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        QCoreApplication.processEvents()
+        if any(path in files for _, files in watcher.batches):
+            watcher.batches.clear()
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_deleted_and_created_again(tmp_path, watcher):
+    path = str(tmp_path / "open.py")
+    with open(path, "w") as f:
+        f.write("a")
+    watcher.watch_folders([str(tmp_path)])
+    watcher.watch_files([path])
+
+    os.remove(path)
+    assert wait_for(watcher, path)
+
+    with open(path, "w") as f:
+        f.write("b")
+    assert wait_for(watcher, path)
+
+    # watched again, not just reported once
+    with open(path, "a") as f:
+        f.write("c")
+    assert wait_for(watcher, path)
@@ -0,0 +1,56 @@
+import time
+
+from parallel_search import ParallelScanner, compile_pattern, scan_file
+
+
+def search(tmp_path, pattern, text):
+    path = tmp_path / "file.txt"
+    path.write_text(text, encoding="utf-8")
+    return scan_file(compile_pattern(pattern), str(path))
+
+
+def test_dot_matches_a_whole_character(tmp_path):
+    assert search(tmp_path, "caf.s", "cafés\n") == [(0, 5, "cafés")]
+    assert search(tmp_path, "caf..s", "cafés\n") == []
+
+
+def test_negated_class_matches_a_whole_character(tmp_path):
+    assert search(tmp_path, "[^a-z]ve", "ok\ncrève x\n") == [(1, 5, "ève x")]
+
+
+def test_ascii_pattern_on_non_ascii_file(tmp_path):
+    assert search(tmp_path, "size", "größe\nsize = 1\n") == [(1, 4, "size = 1")]
+
+
+def test_hits_while_walking(tmp_path, monkeypatch):
+    # every file is a chunk of its own
+    monkeypatch.setattr(ParallelScanner, "MIN_CHUNK_BYTES", 1)
+    monkeypatch.setattr(ParallelScanner, "MAX_CHUNK_BYTES", 1)
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(f"a\nhit {i}\n")
+        paths.append(str(path))
+    filler = tmp_path / "filler.txt"
+    filler.write_text("nothing here\n")
+
+    hits = []
+    hits_during_walk = []
+    def walk():
+        yield from paths[:10]
+        # a slow walk, the first hits come in before it's done
+        deadline = time.monotonic() + 10
+        while not hits and time.monotonic() < deadline:
+            time.sleep(0.01)
+            yield str(filler)
+        hits_during_walk.append(len(hits))
+        yield from paths[10:]
+
+    scanner = ParallelScanner(2)
+    try:
+        for batch in scanner.scan("hit", walk()):
+            hits.extend(batch)
+    finally:
+        scanner.shutdown()
+    assert hits_during_walk[0] > 0
+    assert hits == [(path, 1, 3, f"hit {i}") for i, path in enumerate(paths)]
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from fuzzy_searcher import PathIndex
+
+
+@pytest.fixture
+def index():
+    index = PathIndex()
+    index.root = os.path.abspath("project")
+    # more weaker matches than get scored, all walked before the file that's looked for
+    weaker = PathIndex.MAX_SCORED + 100
+    index.folders = {
+        "docs": [f"main-old{i}.py" for i in range(weaker)],
+        "tests": [f"test_domain{i}.py" for i in range(weaker)],
+        os.path.join("lib", "src"): [f"main_window{i}.py" for i in range(weaker)],
+        "src": ["editor.py", "main.py", "file_manager.py"],
+    }
+    index.dirty = True
+    return index
+
+
+@pytest.mark.parametrize("query", ["main", "main.py", "src/main", "src/main.py"])
+def test_exact_file_after_weaker_matches(index, query):
+    assert index.find(query)[0] == os.path.join("src", "main.py")
+
+
+def test_exact_name_with_underscore(index):
+    assert index.find("file_manager.py")[0] == os.path.join("src", "file_manager.py")